@@ -112,7 +112,7 @@ if st.session_state.browser_running:
         st.markdown(f"### Detected Category: {st.session_state.current_category}")
         
         # Override Category
-        new_cat = st.selectbox("Incorrect Category? Override here:", ["Sneakers", "T-Shirt", "Hoodie", "Jacket"], index=["Sneakers", "T-Shirt", "Hoodie", "Jacket"].index(st.session_state.current_category))
+        new_cat = st.selectbox("Incorrect Category? Override here:", ["Sneakers", "T-Shirt", "Hoodie", "Jacket", "Other"], index=["Sneakers", "T-Shirt", "Hoodie", "Jacket", "Other"].index(st.session_state.current_category))
         if new_cat != st.session_state.current_category:
             st.session_state.current_category = new_cat
             st.experimental_rerun()
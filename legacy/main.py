@@ -70,11 +70,12 @@ def main():
                  
                  final_stockx_price = quoter.capture_price_manual()
                  
-                 cat_input = input("Enter Category (Sneakers/T-Shirt/Hoodie/Jacket) [Default: Sneakers]: ").strip()
+                 cat_input = input("Enter Category (Sneakers/T-Shirt/Hoodie/Jacket/Other) [Default: Sneakers]: ").strip()
                  category = "Sneakers"
                  if "shirt" in cat_input.lower(): category = "T-Shirt"
                  elif "hoodie" in cat_input.lower(): category = "Hoodie"
                  elif "jacket" in cat_input.lower(): category = "Jacket"
+                 elif "other" in cat_input.lower(): category = "Other"
                  
                  if final_stockx_price > 0:
                         service_price = quoter.calculate_service_price(final_stockx_price, category)
@@ -122,12 +123,13 @@ def main():
                         break
                     
                     if choice.lower() == 'cat':
-                        print("\nSelect Category: 1. Sneakers, 2. T-Shirt, 3. Hoodie, 4. Jacket")
+                        print("\nSelect Category: 1. Sneakers, 2. T-Shirt, 3. Hoodie, 4. Jacket, 5. Other")
                         c_idx = input("Enter number: ")
                         if c_idx == '1': category = "Sneakers"
                         elif c_idx == '2': category = "T-Shirt"
                         elif c_idx == '3': category = "Hoodie"
                         elif c_idx == '4': category = "Jacket"
+                        elif c_idx == '5': category = "Other"
                         print(f"Category updated to: {category}")
                         continue
                         
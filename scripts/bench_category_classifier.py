@@ -0,0 +1,94 @@
+"""
+Category classifier: accuracy on the labeled corpus and throughput.
+
+Scores category_classifier.classify against scripts/fixtures/category_corpus.jsonl
+and compares it with the previous chained substring checks from quoter.py.
+No browser needed.
+
+Usage:
+    python scripts/bench_category_classifier.py [--rounds 200] [--show-misses]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+
+from category_classifier import classify, CATEGORIES
+
+CORPUS = os.path.join(ROOT, "scripts", "fixtures", "category_corpus.jsonl")
+
+LEGACY_KEYS = {"Jacket": "jaqueta", "Hoodie": "moletom", "T-Shirt": "camiseta", "Sneakers": "tênis"}
+
+
+def legacy_classify(breadcrumb="", title="", h1=""):
+    # Previous detect_category logic (substring chain over the combined text)
+    search_text = f"{breadcrumb} {title} {h1}".lower()
+    if "jacket" in search_text or "coat" in search_text or "parka" in search_text:
+        label = "Jacket"
+    elif "hoodie" in search_text or "hooded" in search_text or "sweatshirt" in search_text or "pullover" in search_text:
+        label = "Hoodie"
+    elif ("t-shirt" in search_text or "tee" in search_text or "shirt" in search_text or "top" in search_text) \
+            and "sweatshirt" not in search_text:
+        label = "T-Shirt"
+    else:
+        label = "Sneakers"
+    return LEGACY_KEYS[label]
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(fn, corpus):
+    misses = []
+    for row in corpus:
+        predicted = fn(row["breadcrumb"], row["title"], row["h1"])
+        if predicted != row["label"]:
+            misses.append((row, predicted))
+    return misses
+
+
+def throughput(fn, corpus, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for row in corpus:
+            fn(row["breadcrumb"], row["title"], row["h1"])
+    elapsed = time.perf_counter() - start
+    return rounds * len(corpus) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    corpus = load_corpus(CORPUS)
+    per_label = {c: sum(1 for r in corpus if r["label"] == c) for c in CATEGORIES}
+    print(f"Corpus: {os.path.relpath(CORPUS, ROOT)} ({len(corpus)} items: "
+          + ", ".join(f"{c}={n}" for c, n in per_label.items()) + ")")
+
+    # Title/H1 only: the breadcrumb alone would classify most rows
+    no_breadcrumb = [r for r in corpus if not r["breadcrumb"]]
+    print(f"Without breadcrumb: {len(no_breadcrumb)} items")
+
+    for name, fn in (("keyword index", classify), ("legacy chain", legacy_classify)):
+        misses = evaluate(fn, corpus)
+        rate = throughput(fn, corpus, args.rounds)
+        accuracy = 1 - len(misses) / len(corpus)
+        bare_misses = sum(1 for row, _ in misses if not row["breadcrumb"])
+        bare_accuracy = 1 - bare_misses / len(no_breadcrumb) if no_breadcrumb else 1.0
+        print(f"{name:14s}: accuracy {accuracy:6.1%} ({len(misses)} misses), "
+              f"no breadcrumb {bare_accuracy:6.1%}, {rate:10,.0f} items/s")
+        if args.show_misses:
+            for row, predicted in misses:
+                print(f"    {predicted:9s} != {row['label']:9s} {row['h1']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Glin client benchmark against a local fake Glin (no network, no credentials).
+
+Starts scripts/fake_glin.py in-process, points glin_automation at it via
+GLIN_BASE_URL / GLIN_STATE_FILE and measures latency and throughput of:
+
+    single      sequential GlinClient.get_quote, cold terms cache
+    cached      the same amounts again (terms cache hits)
+    concurrent  one shared GlinClient hit from a thread pool
+    batch       AsyncGlinClient.get_quotes in batches
+    links       get_quote with generate_link=True (terms + payment-link POST)
+
+Writes a JSON report; --baseline compares against a previous report and exits
+with status 1 when a scenario regressed more than --tolerance.
+
+Usage:
+    python scripts/bench_glin.py [--count 200] [--latency 20] [--error-rate 0.01]
+                                 [--output report.json] [--baseline old.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+sys.path.append(os.path.join(ROOT, "scripts"))
+
+from fake_glin import FakeGlin, write_state
+from tracing import summarize
+
+SCENARIOS = ("single", "cached", "concurrent", "batch", "links")
+
+
+def quiet(msg):
+    pass
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def make_amounts(count, seed):
+    # Distinct amounts (in cents) so every call misses the terms cache
+    rng = random.Random(seed)
+    return [cents / 100 for cents in rng.sample(range(5_000, 500_000), count)]
+
+
+def new_client(glin):
+    # Fresh in-memory cache and link registry per scenario (no SQLite, no local model)
+    return glin.GlinClient(terms_cache=glin.TTLCache(maxsize=100_000, ttl=3600),
+                           link_registry=glin.PaymentLinkRegistry(maxsize=100_000))
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def result_entry(samples, results, elapsed, server, unit="quote"):
+    ok = sum(1 for r in results if r)
+    entry = {
+        "requests": len(results),
+        "ok": ok,
+        "failed": len(results) - ok,
+        "seconds": round(elapsed, 4),
+        "throughput": round(len(results) / elapsed, 2) if elapsed else None,
+        "latency_unit": unit,
+        "latency_ms": summarize(samples) if samples else None,
+        "server_requests": dict(server.hits),
+    }
+    return entry
+
+
+def run_sequential(client, amounts, generate_link=False):
+    samples, results = [], []
+    start = time.perf_counter()
+    for amount in amounts:
+        result, duration = timed(client.get_quote, amount, generate_link=generate_link, log_func=quiet)
+        samples.append(duration)
+        results.append(result)
+    return samples, results, time.perf_counter() - start
+
+
+def run_concurrent(client, amounts, threads):
+    def one(amount):
+        return timed(client.get_quote, amount, log_func=quiet)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outcomes = list(pool.map(one, amounts))
+    elapsed = time.perf_counter() - start
+    return [d for _, d in outcomes], [r for r, _ in outcomes], elapsed
+
+
+def run_batch(glin, client, amounts, batch_size, concurrency):
+    async def go():
+        samples, results = [], []
+        async with glin.AsyncGlinClient(client=client, concurrency=concurrency) as async_client:
+            if not await async_client.open(quiet):
+                return samples, [None] * len(amounts)
+            for i in range(0, len(amounts), batch_size):
+                chunk = amounts[i:i + batch_size]
+                start = time.perf_counter()
+                results.extend(await async_client.get_quotes(chunk, log_func=quiet))
+                samples.append(time.perf_counter() - start)
+        return samples, results
+
+    start = time.perf_counter()
+    samples, results = asyncio.run(go())
+    return samples, results, time.perf_counter() - start
+
+
+def run_scenarios(glin, server, args):
+    amounts = make_amounts(args.count, args.seed)
+    report = {}
+
+    def record(name, run, unit="quote"):
+        if name not in args.scenarios:
+            return
+        server.reset_counters()
+        samples, results, elapsed = run()
+        report[name] = result_entry(samples, results, elapsed, server, unit)
+        print_row(name, report[name])
+
+    client = new_client(glin)
+    # Session validation is not part of any scenario
+    client.ensure_session(quiet)
+    record("single", lambda: run_sequential(client, amounts))
+    if "single" not in args.scenarios:
+        run_sequential(client, amounts)
+    record("cached", lambda: run_sequential(client, amounts))
+
+    client = new_client(glin)
+    client.ensure_session(quiet)
+    record("concurrent", lambda: run_concurrent(client, amounts, args.threads))
+
+    client = new_client(glin)
+    client.ensure_session(quiet)
+    record("batch", lambda: run_batch(glin, client, amounts, args.batch_size, args.concurrency), unit="batch")
+
+    client = new_client(glin)
+    client.ensure_session(quiet)
+    link_amounts = amounts[:max(1, args.count // 4)]
+    record("links", lambda: run_sequential(client, link_amounts, generate_link=True))
+    return report
+
+
+def print_header():
+    print(f"{'scenario':<11} {'n':>6} {'failed':>6} {'quotes/s':>10} {'unit':>6} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+
+
+def print_row(name, entry):
+    lat = entry["latency_ms"] or {}
+    print(f"{name:<11} {entry['requests']:>6} {entry['failed']:>6} {entry['throughput'] or 0:>10.1f} "
+          f"{entry['latency_unit']:>6} {lat.get('p50', 0):>9.2f} {lat.get('p95', 0):>9.2f} "
+          f"{lat.get('p99', 0):>9.2f} {lat.get('max', 0):>9.2f}")
+
+
+def compare(report, baseline, tolerance):
+    """Prints p50/throughput deltas against a previous report; returns the regressed scenarios."""
+    regressions = []
+    print(f"\nAgainst baseline {baseline.get('revision') or '?'} ({baseline.get('created_at', '?')}):")
+    for name, entry in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before or not before.get("throughput") or not entry.get("throughput"):
+            continue
+        p50_now = (entry["latency_ms"] or {}).get("p50")
+        p50_before = (before["latency_ms"] or {}).get("p50")
+        throughput_delta = entry["throughput"] / before["throughput"] - 1
+        p50_delta = p50_now / p50_before - 1 if p50_now and p50_before else 0.0
+        regressed = throughput_delta < -tolerance or p50_delta > tolerance
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<11} throughput {throughput_delta:+7.1%}  p50 {p50_delta:+7.1%}"
+              + ("  REGRESSION" if regressed else ""))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=200, help="quotes per scenario")
+    parser.add_argument("--threads", type=int, default=8, help="threads in the concurrent scenario")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8, help="AsyncGlinClient concurrency")
+    parser.add_argument("--latency", type=float, default=20.0, help="fake server latency per request, in ms")
+    parser.add_argument("--jitter", type=float, default=5.0, help="random extra latency up to N ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 503 on terms/links")
+    parser.add_argument("--auth-error-rate", type=float, default=0.0, help="probability of a 401 on terms/links")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("-o", "--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown (default 0.2)")
+    args = parser.parse_args(argv)
+
+    server = FakeGlin(latency=args.latency / 1000, jitter=args.jitter / 1000, error_rate=args.error_rate,
+                      auth_error_rate=args.auth_error_rate, seed=args.seed)
+    with server, tempfile.TemporaryDirectory() as tmp:
+        # Must be set before glin_automation is imported (BASE_URL is read at import time)
+        os.environ["GLIN_BASE_URL"] = server.url
+        os.environ["GLIN_STATE_FILE"] = write_state(os.path.join(tmp, "state.json"))
+        for name in ("GLIN_TERMS_CACHE_DB", "GLIN_LINK_REGISTRY_DB", "GLIN_LOCAL_TERMS"):
+            os.environ.pop(name, None)
+        import glin_automation as glin
+
+        print(f"Fake Glin at {server.url}: latency {args.latency:g} ms (+{args.jitter:g} jitter), "
+              f"errors {args.error_rate:.1%} 5xx / {args.auth_error_rate:.1%} 401")
+        print_header()
+        scenarios = run_scenarios(glin, server, args)
+
+    report = {
+        "benchmark": "glin_client",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "scenarios": scenarios,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
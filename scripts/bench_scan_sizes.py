@@ -0,0 +1,76 @@
+"""
+Microbenchmark: size menu extraction, per-item inner_text() vs one evaluate_all().
+
+Loads the saved fixture page (scripts/fixtures/pdp_size_menu.html) in headless
+Chromium and times both ways of reading the size options.
+
+Usage:
+    python scripts/bench_scan_sizes.py [--rounds 50]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+
+from playwright.sync_api import sync_playwright
+from quoter import MENU_ITEM_SELECTOR, SIZE_OPTIONS_JS, parse_size_option
+
+FIXTURE = os.path.join(ROOT, "scripts", "fixtures", "pdp_size_menu.html")
+
+
+def old_path(page):
+    # Previous scan_sizes loop: one round trip per menu item
+    menu_items = page.locator(MENU_ITEM_SELECTOR)
+    count = menu_items.count()
+    options = []
+    for i in range(count):
+        raw_text = menu_items.nth(i).inner_text().replace('\n', ' ').strip()
+        options.append({"index": i, "text": raw_text})
+    return options
+
+
+def new_path(page):
+    texts = page.locator(MENU_ITEM_SELECTOR).evaluate_all(SIZE_OPTIONS_JS)
+    return [parse_size_option(i, text) for i, text in enumerate(texts)]
+
+
+def bench(fn, page, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn(page)
+        samples.append(time.perf_counter() - start)
+    return result, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.goto("file://" + FIXTURE)
+
+        old_result, old_samples = bench(old_path, page, args.rounds)
+        new_result, new_samples = bench(new_path, page, args.rounds)
+        browser.close()
+
+    assert [o["text"] for o in old_result] == [n["text"] for n in new_result], "paths disagree"
+
+    old_ms = statistics.median(old_samples) * 1000
+    new_ms = statistics.median(new_samples) * 1000
+    print(f"Fixture: {os.path.relpath(FIXTURE, ROOT)} ({len(new_result)} sizes, {args.rounds} rounds)")
+    print(f"inner_text loop : {old_ms:8.2f} ms (median)")
+    print(f"evaluate_all    : {new_ms:8.2f} ms (median)")
+    print(f"speedup         : {old_ms / new_ms:8.1f}x")
+    print(f"sample parsed   : {new_result[0]}")
+
+
+if __name__ == "__main__":
+    main()
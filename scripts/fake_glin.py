@@ -0,0 +1,242 @@
+"""
+Local stand-in for the Glin merchant API, for offline benchmarks.
+
+Serves the three routes glin_automation uses, with the same response shapes:
+
+    GET  /api/user                                   -> {"merchants": [{"slug": ...}]}
+    GET  /app/merchants/{slug}/payment-terms/USD{x}  -> {"paymentTerms": {"options": [...]}}
+    POST /app/merchants/{slug}/payment-links         -> {"id": ...}
+
+Requests without the session cookie get 401 (as an expired session would).
+Latency, jitter and error injection (5xx and 401 on terms/links) are
+configurable, and every route keeps a request counter.
+
+Point the client at it with GLIN_BASE_URL (and GLIN_STATE_FILE holding the
+fake cookie, see write_state()). Standalone:
+
+    python scripts/fake_glin.py --port 8900 --latency 80 --error-rate 0.02
+"""
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SESSION_COOKIE = "glin_session"
+SESSION_TOKEN = "fake-session-token"
+DEFAULT_SLUG = "fake-merchant"
+BRL_RATE = 5.50
+
+TERMS_RE = re.compile(r"^/app/merchants/([^/]+)/payment-terms/USD([0-9.]+)$")
+LINKS_RE = re.compile(r"^/app/merchants/([^/]+)/payment-links$")
+
+
+def payment_terms(usd_amount, rate=BRL_RATE, max_installments=12):
+    """Pix total plus 1..N card plans, with a 2% surcharge per installment."""
+    brl = usd_amount * rate
+    plans = []
+    for n in range(1, max_installments + 1):
+        total = round(brl * (1 + 0.02 * n), 2)
+        plans.append({"installments": n, "installmentAmount": round(total / n, 2), "totalAmount": total})
+    return {
+        "options": [
+            {"method": "pix", "totalDueAmount": round(brl, 2)},
+            {"method": "card", "installmentPlans": plans},
+        ]
+    }
+
+
+def write_state(path, token=SESSION_TOKEN):
+    """Writes a Playwright storage_state with the fake session cookie."""
+    state = {"cookies": [{"name": SESSION_COOKIE, "value": token, "domain": "127.0.0.1", "path": "/"}],
+             "origins": []}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    return path
+
+
+class FakeGlinHandler(BaseHTTPRequestHandler):
+    server_version = "FakeGlin/1.0"
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive
+    # clients hit Nagle + delayed ACK stalls (~40 ms) that Glin doesn't have
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self):
+        cookies = self.headers.get("Cookie", "")
+        return f"{SESSION_COOKIE}={self.server.token}" in cookies
+
+    def _route(self, method):
+        path = self.path.split("?", 1)[0]
+        if method == "GET" and path == "/api/user":
+            return "user", None
+        match = TERMS_RE.match(path)
+        if method == "GET" and match:
+            return "terms", match
+        match = LINKS_RE.match(path)
+        if method == "POST" and match:
+            return "links", match
+        return None, None
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        route, match = self._route(method)
+        fake = self.server
+        fake.count(route or "not_found")
+        fake.delay()
+
+        if route is None:
+            return self._send(404, {"error": "not found"})
+        if not self._authorized():
+            return self._send(401, {"error": "unauthorized"})
+        if route == "user":
+            return self._send(200, {"merchants": [{"slug": fake.slug}]})
+
+        failure = fake.inject_failure()
+        if failure:
+            return self._send(failure, {"error": "injected"})
+
+        if match.group(1) != fake.slug:
+            return self._send(404, {"error": "unknown merchant"})
+        if route == "terms":
+            return self._send(200, {"paymentTerms": payment_terms(float(match.group(2)), fake.rate)})
+
+        try:
+            amount = float(json.loads(body or b"{}").get("amount"))
+        except (ValueError, TypeError):
+            return self._send(400, {"error": "invalid amount"})
+        return self._send(201, {"id": fake.next_link_id(), "amount": amount, "currency": "USD"})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class FakeGlin(ThreadingHTTPServer):
+    """
+    Fake Glin server running in a background thread.
+
+    `latency`/`jitter` are seconds added to every request; `error_rate` and
+    `auth_error_rate` are the probabilities of a 503 / 401 on payment-terms
+    and payment-links (session validation always succeeds, so the client
+    recovers without a browser login).
+    """
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 auth_error_rate=0.0, slug=DEFAULT_SLUG, token=SESSION_TOKEN, rate=BRL_RATE, seed=None):
+        super().__init__((host, port), FakeGlinHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.auth_error_rate = auth_error_rate
+        self.slug = slug
+        self.token = token
+        self.rate = rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._link_seq = 0
+        self.hits = {}
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, route):
+        with self._lock:
+            self.hits[route] = self.hits.get(route, 0) + 1
+
+    def delay(self):
+        if self.latency or self.jitter:
+            with self._lock:
+                extra = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+            time.sleep(self.latency + extra)
+
+    def inject_failure(self):
+        """Returns 503/401 according to the configured rates, or None."""
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.error_rate:
+            return 503
+        if roll < self.error_rate + self.auth_error_rate:
+            return 401
+        return None
+
+    def next_link_id(self):
+        with self._lock:
+            self._link_seq += 1
+            return f"fk{self._link_seq:06d}"
+
+    def reset_counters(self):
+        with self._lock:
+            self.hits = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-glin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0, help="added latency per request, in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency up to N ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 503 on terms/links")
+    parser.add_argument("--auth-error-rate", type=float, default=0.0, help="probability of a 401 on terms/links")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--state", help="also write a state.json with the fake session cookie here")
+    args = parser.parse_args(argv)
+
+    server = FakeGlin(args.host, args.port, latency=args.latency / 1000, jitter=args.jitter / 1000,
+                      error_rate=args.error_rate, auth_error_rate=args.auth_error_rate, seed=args.seed)
+    if args.state:
+        write_state(args.state)
+        print(f"Session state written to {args.state} (use GLIN_STATE_FILE={args.state})")
+    print(f"Fake Glin listening on {server.url} (use GLIN_BASE_URL={server.url}); Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Requests: {json.dumps(server.hits)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
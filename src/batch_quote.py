@@ -0,0 +1,319 @@
+"""
+Cotação em lote, sem interação (ex.: reprecificação noturna de uma planilha).
+
+Lê um CSV ou JSONL com colunas source, category, price e size, passa cada
+linha pelo QuoteCalculator e, opcionalmente, pelos payment-terms da Glin, e
+escreve o resultado (JSONL ou CSV) de forma incremental.
+
+Tudo é um pipeline de geradores: as linhas são lidas, calculadas e escritas
+em blocos de `chunk_size`, então a memória não cresce com o tamanho do
+arquivo.
+
+Uso:
+    python -m quoter batch items.csv -o cotacoes.jsonl [--glin] [--links]
+"""
+import os
+import sys
+import csv
+import json
+import math
+import asyncio
+import argparse
+from itertools import islice
+
+from calculator import QuoteCalculator
+from category_classifier import CATEGORY_LABELS
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Valores aceitos na coluna "source"
+SOURCE_ALIASES = {
+    '': 'stockx',
+    'stockx': 'stockx',
+    'other': 'other',
+    'outros': 'other',
+    'outros sites': 'other',
+}
+
+# Rótulos legados ('Sneakers', 'T-Shirt', ...) e grafias sem acento -> chave do QuoteCalculator
+CATEGORY_ALIASES = {label.lower(): key for key, label in CATEGORY_LABELS.items()}
+CATEGORY_ALIASES.update({'tenis': 'tênis', 'sneaker': 'tênis', 'tee': 'camiseta'})
+
+CSV_FIELDS = (
+    'row', 'source', 'category', 'size', 'price',
+    'final_quote', 'stockx_total', 'markup_total', 'fee',
+    'pix', 'card_1x', 'payment_link', 'error',
+)
+
+
+# ──────────────────────────────────────────────
+# Leitura
+# ──────────────────────────────────────────────
+
+def _detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_items(path, fmt=None):
+    """Gera um dict por linha do arquivo (CSV com cabeçalho ou JSONL), com a chave '_row'."""
+    fmt = _detect_format(path, fmt)
+    stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+    try:
+        if fmt == 'csv':
+            for row_number, row in enumerate(csv.DictReader(stream), start=1):
+                row = {(k or '').strip().lower(): v for k, v in row.items()}
+                row['_row'] = row_number
+                yield row
+        else:
+            for row_number, line in enumerate(stream, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = {str(k).lower(): v for k, v in json.loads(line).items()}
+                except (ValueError, AttributeError) as e:
+                    row = {'_error': f"JSON inválido: {e}"}
+                row['_row'] = row_number
+                yield row
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _parse_price(value):
+    if isinstance(value, bool):
+        raise ValueError("preço inválido")
+    if isinstance(value, (int, float)):
+        price = float(value)
+    else:
+        text = str(value or '').replace('$', '').replace(',', '').strip()
+        if not text:
+            raise ValueError("preço vazio")
+        price = float(text)
+    # float() aceita "nan", "inf" e negativos: nenhum deles é um preço
+    if not (math.isfinite(price) and price > 0):
+        raise ValueError("preço deve ser um número positivo")
+    return price
+
+
+def parse_item(row, calculator):
+    """Normaliza uma linha lida em {row, source, category, price, size, error}."""
+    item = {
+        'row': row.get('_row'),
+        'source': None,
+        'category': None,
+        'size': str(row.get('size') or '').strip(),
+        'price': None,
+        'error': row.get('_error'),
+    }
+    if item['error']:
+        return item
+
+    source = str(row.get('source') or '').strip().lower()
+    if source not in SOURCE_ALIASES:
+        item['error'] = f"Origem desconhecida: {source}"
+        return item
+    item['source'] = SOURCE_ALIASES[source]
+
+    category = str(row.get('category') or '').strip().lower()
+    category = CATEGORY_ALIASES.get(category, category)
+    if item['source'] == 'stockx' and category not in calculator.shipping_costs:
+        item['error'] = f"Categoria desconhecida: {category}"
+        return item
+    # Outros Sites aceita qualquer categoria (sem taxa extra), como calculate_other_platform
+    item['category'] = category or 'outros'
+
+    try:
+        item['price'] = _parse_price(row.get('price'))
+    except ValueError:
+        item['error'] = f"Preço inválido: {row.get('price')}"
+    return item
+
+
+# ──────────────────────────────────────────────
+# Etapas do pipeline
+# ──────────────────────────────────────────────
+
+def chunked(iterable, size):
+    """Agrupa um iterável em listas de até `size` itens."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def quote_chunks(items, calculator, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Calcula as cotações bloco a bloco com QuoteCalculator.calculate_batch
+    (uma chamada por origem em cada bloco). Gera listas de resultados.
+    """
+    for chunk in chunked(items, chunk_size):
+        for source, total_key in (('stockx', 'stockx_total'), ('other', 'markup_total')):
+            rows = [item for item in chunk if not item['error'] and item['source'] == source]
+            if not rows:
+                continue
+            columns = calculator.calculate_batch(
+                [item['price'] for item in rows],
+                [item['category'] for item in rows],
+                source=source,
+            )
+            if source == 'stockx':
+                fees = [calculator.service_fees[item['category']] for item in rows]
+            else:
+                fees = columns['fee']
+            for item, quote, total, fee in zip(rows, columns['final_quote'], columns[total_key], fees):
+                item['final_quote'] = round(float(quote), 2)
+                item[total_key] = round(float(total), 2)
+                item['fee'] = float(fee)
+        yield chunk
+
+
+def glin_chunks(chunks, generate_links=False, concurrency=None, log_func=None):
+    """
+    Acrescenta Pix, cartão 1x, parcelas e (opcionalmente) o link de
+    pagamento da Glin a cada linha cotada.
+
+    Um único AsyncGlinClient (uma sessão, um pool de conexões) atende o
+    lote inteiro; cada bloco é cotado em paralelo e liberado antes do
+    próximo ser lido.
+    """
+    from glin_automation import AsyncGlinClient, ASYNC_CONCURRENCY
+
+    loop = asyncio.new_event_loop()
+    client = AsyncGlinClient(concurrency=concurrency or ASYNC_CONCURRENCY)
+    try:
+        ready = loop.run_until_complete(client.open(log_func))
+        for chunk in chunks:
+            rows = [item for item in chunk if not item['error']]
+            if rows and ready:
+                results = loop.run_until_complete(client.get_quotes(
+                    [item['final_quote'] for item in rows],
+                    generate_links=generate_links,
+                    log_func=log_func,
+                ))
+            else:
+                results = [None] * len(rows)
+            for item, glin_data in zip(rows, results):
+                if glin_data is None:
+                    item['error'] = "Falha ao obter dados da Glin."
+                    continue
+                item['pix'] = glin_data.get('pix')
+                item['card_1x'] = glin_data.get('card_1x')
+                item['installments'] = glin_data.get('installments')
+                item['payment_link'] = glin_data.get('payment_link')
+            yield chunk
+    finally:
+        loop.run_until_complete(client.close())
+        loop.close()
+
+
+# ──────────────────────────────────────────────
+# Escrita
+# ──────────────────────────────────────────────
+
+class JsonlWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write_chunk(self, chunk):
+        for item in chunk:
+            self.stream.write(json.dumps(item, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+
+class CsvWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        self.writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        self.writer.writeheader()
+
+    def write_chunk(self, chunk):
+        self.writer.writerows(chunk)
+        self.stream.flush()
+
+
+WRITERS = {'jsonl': JsonlWriter, 'csv': CsvWriter}
+
+
+def run_batch(input_path, output_path='-', input_format=None, output_format=None,
+              glin=False, generate_links=False, chunk_size=DEFAULT_CHUNK_SIZE,
+              concurrency=None, calculator=None, log_func=None):
+    """
+    Executa o pipeline completo e retorna um resumo {rows, quoted, errors}.
+
+    `output_path='-'` escreve na saída padrão. O formato de saída é deduzido
+    da extensão (.csv ou .jsonl) quando não informado.
+    """
+    calculator = calculator or QuoteCalculator()
+    if output_format is None:
+        output_format = 'csv' if output_path.lower().endswith('.csv') else 'jsonl'
+
+    items = (parse_item(row, calculator) for row in read_items(input_path, input_format))
+    chunks = quote_chunks(items, calculator, chunk_size)
+    if glin or generate_links:
+        # Sem log_func a Glin usaria print(), o que misturaria logs com a saída em stdout
+        chunks = glin_chunks(chunks, generate_links=generate_links, concurrency=concurrency,
+                             log_func=log_func or (lambda msg: None))
+
+    summary = {'rows': 0, 'quoted': 0, 'errors': 0}
+    stream = sys.stdout if output_path == '-' else open(output_path, 'w', newline='', encoding='utf-8')
+    try:
+        writer = WRITERS[output_format](stream)
+        for chunk in chunks:
+            writer.write_chunk(chunk)
+            summary['rows'] += len(chunk)
+            summary['errors'] += sum(1 for item in chunk if item['error'])
+            if log_func:
+                log_func(f"{summary['rows']} linhas processadas ({summary['errors']} com erro)")
+    finally:
+        chunks.close()
+        if stream is not sys.stdout:
+            stream.close()
+    summary['quoted'] = summary['rows'] - summary['errors']
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m quoter batch',
+        description="Cotação em lote a partir de um CSV/JSONL (colunas: source, category, price, size).",
+    )
+    parser.add_argument('input', help="arquivo .csv ou .jsonl ('-' para stdin)")
+    parser.add_argument('-o', '--output', default='-', help="arquivo de saída .jsonl ou .csv (padrão: stdout)")
+    parser.add_argument('--input-format', choices=('csv', 'jsonl'))
+    parser.add_argument('--output-format', choices=tuple(WRITERS))
+    parser.add_argument('--glin', action='store_true', help="inclui Pix e parcelas da Glin")
+    parser.add_argument('--links', action='store_true', help="gera link de pagamento da Glin (implica --glin)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--concurrency', type=int, help="requisições simultâneas à Glin")
+    parser.add_argument('-q', '--quiet', action='store_true', help="sem mensagens de progresso")
+    args = parser.parse_args(argv)
+
+    def log(msg):
+        # Progresso vai para stderr para não misturar com a saída em stdout
+        print(msg, file=sys.stderr)
+
+    if args.input != '-' and not os.path.exists(args.input):
+        parser.error(f"arquivo não encontrado: {args.input}")
+
+    summary = run_batch(
+        args.input,
+        output_path=args.output,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        glin=args.glin,
+        generate_links=args.links,
+        chunk_size=max(1, args.chunk_size),
+        concurrency=args.concurrency,
+        log_func=None if args.quiet else log,
+    )
+    log(f"Concluído: {summary['quoted']} cotadas, {summary['errors']} com erro, {summary['rows']} linhas.")
+    return 1 if summary['rows'] and not summary['quoted'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
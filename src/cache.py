@@ -0,0 +1,159 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class SQLiteBacking:
+    """
+    Armazenamento em disco (SQLite) para um TTLCache.
+    Os valores são guardados como JSON junto com o horário de gravação.
+    """
+
+    def __init__(self, path: str, table: str = "cache"):
+        if not table.isidentifier():
+            raise ValueError(f"Nome de tabela inválido: {table}")
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str):
+        """Retorna (valor, stored_at) ou None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value, stored_at: float):
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, payload, stored_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def purge(self, older_than: float):
+        """Remove entradas gravadas antes de `older_than` (epoch)."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE stored_at < ?", (older_than,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TTLCache:
+    """
+    Cache LRU em memória com expiração por tempo (TTL), thread-safe.
+
+    Opcionalmente usa um SQLiteBacking como segundo nível: falhas na memória
+    consultam o disco e entradas ainda válidas são promovidas de volta.
+    Mantém contadores de acertos/falhas legíveis via `stats()`.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0, backing: SQLiteBacking = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backing = backing
+        self._data = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def _fresh(self, stored_at: float, now: float) -> bool:
+        return now - stored_at < self.ttl
+
+    def get(self, key: str, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if self._fresh(entry[1], now):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._data[key]
+                self.expired += 1
+
+        if self.backing is not None:
+            stored = self.backing.get(key)
+            if stored is not None:
+                value, stored_at = stored
+                if self._fresh(stored_at, now):
+                    with self._lock:
+                        self._store(key, value, stored_at)
+                        self.hits += 1
+                        self.disk_hits += 1
+                    return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def _store(self, key, value, stored_at):
+        """Insere na memória respeitando o limite LRU. Requer o lock."""
+        self._data[key] = (value, stored_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def set(self, key: str, value):
+        stored_at = time.time()
+        with self._lock:
+            self._store(key, value, stored_at)
+        if self.backing is not None:
+            self.backing.set(key, value, stored_at)
+
+    def invalidate(self, key: str = None):
+        """Remove uma chave, ou tudo se `key` for None."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+        if self.backing is not None:
+            if key is None:
+                self.backing.clear()
+            else:
+                self.backing.delete(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "size": len(self._data),
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
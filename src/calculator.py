@@ -5,6 +5,11 @@ try:
 except ImportError:
     get_glin_quote = None
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 class QuoteCalculator:
     def __init__(self):
         # Taxas de Imposto e Processamento
@@ -30,6 +35,15 @@ class QuoteCalculator:
             'outros': 0.0 # Sem taxa extra por padrão
         }
 
+        # Taxas fixas para outros sites (Non-StockX)
+        self.other_platform_fees = {
+            'tênis': 50.0,
+            'camiseta': 20.0,
+            'moletom': 30.0,
+            'jaqueta': 30.0,
+            'outros': 0.0
+        }
+
     def calculate(self, base_price, category):
         category = category.lower()
         if category not in self.shipping_costs:
@@ -66,15 +80,8 @@ class QuoteCalculator:
         # Markup base de 15%
         base_markup = base_price * 1.15
         
-        fee = 0.0
-        if category == 'tênis':
-            fee = 50.0
-        elif category in ['moletom', 'jaqueta']:
-            fee = 30.0
-        elif category == 'camiseta':
-            fee = 20.0
-        else:
-            fee = 0.0 # Outros / Genérico
+        # Categorias desconhecidas caem em Outros / Genérico (sem taxa)
+        fee = self.other_platform_fees.get(category, 0.0)
             
         final_quote = base_markup + fee
         
@@ -85,6 +92,103 @@ class QuoteCalculator:
             'final_quote': final_quote
         }
 
+    def calculate_batch(self, prices, categories, source='stockx'):
+        """
+        Calcula cotações em lote (colunar) para muitos itens de uma vez.
+
+        `prices` pode ser um array NumPy ou qualquer sequência de números.
+        `categories` pode ser uma sequência (uma por preço) ou uma única string
+        aplicada a todo o lote. `source` é 'stockx' ou 'other' (Outros Sites).
+
+        As taxas e o shipping de cada categoria são consultados uma vez por
+        lote, não uma vez por linha. Os resultados são idênticos aos de
+        `calculate` / `calculate_other_platform` item a item.
+
+        Retorna um dicionário de colunas (arrays NumPy, ou listas se o NumPy
+        não estiver instalado):
+            - stockx: base_price, stockx_tax, stockx_processing,
+              stockx_shipping, stockx_total, final_quote
+            - other:  base_price, markup_total, fee, final_quote
+        """
+        source = source.lower()
+        if source not in ('stockx', 'other'):
+            raise ValueError(f"Origem desconhecida: {source}")
+
+        if np is not None:
+            base = np.asarray(prices, dtype=np.float64).ravel()
+        else:
+            base = [float(p) for p in prices]
+        n = len(base)
+
+        if isinstance(categories, str):
+            categories = [categories] * n
+        else:
+            categories = list(categories)
+        if len(categories) != n:
+            raise ValueError(
+                f"Tamanhos diferentes: {n} preços e {len(categories)} categorias"
+            )
+
+        # Resolve cada categoria distinta uma única vez
+        codes = {}
+        inverse = []
+        for cat in categories:
+            key = cat.lower()
+            code = codes.get(key)
+            if code is None:
+                if source == 'stockx' and key not in self.shipping_costs:
+                    raise ValueError(f"Categoria desconhecida: {key}")
+                code = codes[key] = len(codes)
+            inverse.append(code)
+        unique = list(codes)
+
+        if source == 'stockx':
+            ship_table = [self.shipping_costs[c] for c in unique]
+            fee_table = [self.service_fees[c] for c in unique]
+        else:
+            fee_table = [self.other_platform_fees.get(c, 0.0) for c in unique]
+
+        # Mesma ordem de operações do cálculo escalar (resultado bit a bit igual)
+        if np is not None:
+            inverse = np.asarray(inverse, dtype=np.intp)
+            fee = np.asarray(fee_table, dtype=np.float64)[inverse]
+            if source == 'stockx':
+                shipping = np.asarray(ship_table, dtype=np.float64)[inverse]
+                tax = base * self.tax_rate
+                processing = base * self.processing_rate
+                stockx_total = base + tax + processing + shipping
+                quote = (stockx_total * 0.98) + fee
+            else:
+                markup = base * 1.15
+                quote = markup + fee
+        else:
+            fee = [fee_table[i] for i in inverse]
+            if source == 'stockx':
+                shipping = [ship_table[i] for i in inverse]
+                tax = [b * self.tax_rate for b in base]
+                processing = [b * self.processing_rate for b in base]
+                stockx_total = [b + t + p + s for b, t, p, s in zip(base, tax, processing, shipping)]
+                quote = [(t * 0.98) + f for t, f in zip(stockx_total, fee)]
+            else:
+                markup = [b * 1.15 for b in base]
+                quote = [m + f for m, f in zip(markup, fee)]
+
+        if source == 'stockx':
+            return {
+                'base_price': base,
+                'stockx_tax': tax,
+                'stockx_processing': processing,
+                'stockx_shipping': shipping,
+                'stockx_total': stockx_total,
+                'final_quote': quote
+            }
+        return {
+            'base_price': base,
+            'markup_total': markup,
+            'fee': fee,
+            'final_quote': quote
+        }
+
 def format_currency(value):
     return f"${value:,.2f}"
 
@@ -0,0 +1,131 @@
+import re
+
+# Chaves de categoria usadas pelo QuoteCalculator
+CATEGORIES = ('tênis', 'camiseta', 'moletom', 'jaqueta', 'outros')
+
+# Rótulos usados pelo StockXQuoter / telas legadas
+CATEGORY_LABELS = {
+    'tênis': 'Sneakers',
+    'camiseta': 'T-Shirt',
+    'moletom': 'Hoodie',
+    'jaqueta': 'Jacket',
+    'outros': 'Other',
+}
+
+# Desempate: do mais específico para o mais genérico
+# (ex.: "Hooded Jacket" é jaqueta, "Hoodie Sweatshirt" é moletom)
+PRIORITY = {'jaqueta': 0, 'moletom': 1, 'camiseta': 2, 'outros': 3, 'tênis': 4}
+
+DEFAULT_CATEGORY = 'tênis'
+
+# Palavras-chave (tokens inteiros ou bigramas) -> categoria
+KEYWORDS = {
+    'jaqueta': (
+        'jacket', 'jackets', 'coat', 'coats', 'parka', 'parkas', 'puffer', 'anorak',
+        'windbreaker', 'bomber', 'varsity', 'vest', 'gilet', 'down jacket', 'shell',
+    ),
+    'moletom': (
+        'hoodie', 'hoodies', 'hooded', 'sweatshirt', 'sweatshirts', 'pullover', 'crewneck',
+        'crew neck', 'sweater', 'quarter zip', 'half zip', 'fleece',
+    ),
+    'camiseta': (
+        't-shirt', 't-shirts', 'tshirt', 'tee', 'tees', 't shirt', 'shirt', 'shirts', 'top', 'tops',
+        'long sleeve', 'polo', 'jersey', 'tank',
+    ),
+    'tênis': (
+        'sneakers', 'sneaker', 'shoes', 'shoe', 'retro', 'dunk', 'jordan', 'yeezy boost',
+        'air max', 'air force', 'slide', 'slides', 'clog', 'clogs', 'trainer', 'trainers',
+        'runner', 'boot', 'boots', 'foam runner',
+        # Modelos que aparecem sem breadcrumb junto de cores/apelidos como "Varsity Red"
+        'superstar', 'shell toe', 'samba', 'gazelle', 'campus', 'stan smith', 'ultraboost',
+        'nmd', 'blazer', 'cortez', 'pegasus', 'vomero', 'chuck', 'gel-lyte', 'gel-kayano',
+    ),
+    'outros': (
+        'accessories', 'bag', 'bags', 'backpack', 'handbags', 'wallet', 'cap', 'hat', 'beanie',
+        'socks', 'watch', 'watches', 'collectibles', 'figure', 'toy', 'electronics', 'console',
+        'trading cards', 'card', 'keychain', 'shorts', 'pants', 'sweatpants', 'jeans', 'skateboard',
+    ),
+}
+
+# Palavras de vestuário que também são nomes de cor/modelo de tênis
+# ("Varsity Red", "Shell Toe", "Dunk Low Vest", "Air Max 90 Top"): valem metade,
+# então um modelo de tênis no mesmo texto vence
+AMBIGUOUS_KEYWORDS = frozenset({'varsity', 'shell', 'vest', 'top', 'tops', 'jersey', 'tank'})
+AMBIGUOUS_WEIGHT = 0.5
+
+# Peso por origem do texto: o breadcrumb é o sinal mais confiável
+SOURCE_WEIGHTS = {'breadcrumb': 2.0, 'h1': 1.0, 'title': 1.0}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def _build_index(keywords):
+    """Índice pré-compilado: token ou bigrama -> (categoria, peso)."""
+    index = {}
+    for category, words in keywords.items():
+        for word in words:
+            index[word] = (category, AMBIGUOUS_WEIGHT if word in AMBIGUOUS_KEYWORDS else 1.0)
+    return index
+
+
+KEYWORD_INDEX = _build_index(KEYWORDS)
+
+
+def tokenize(text):
+    """
+    Retorna (tokens, expandidos), em minúsculas. Palavras com hífen ficam
+    inteiras em `tokens` ('t-shirt') e `expandidos` ainda traz as partes
+    ('t-shirt', 't', 'shirt'). Os bigramas saem de `tokens` em score().
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    expanded = []
+    for token in tokens:
+        expanded.append(token)
+        if '-' in token:
+            expanded.extend(token.split('-'))
+    return tokens, expanded
+
+
+def score(text, weight=1.0, index=KEYWORD_INDEX, scores=None):
+    """Soma os pesos das palavras-chave (tokens e bigramas) encontradas em `text`."""
+    scores = {} if scores is None else scores
+    tokens, expanded = tokenize(text)
+    seen = set()
+    for token in expanded:
+        hit = index.get(token)
+        if hit and token not in seen:
+            seen.add(token)
+            category, factor = hit
+            scores[category] = scores.get(category, 0.0) + weight * factor
+    for first, second in zip(tokens, tokens[1:]):
+        bigram = f"{first} {second}"
+        hit = index.get(bigram)
+        if hit and bigram not in seen:
+            seen.add(bigram)
+            category, factor = hit
+            scores[category] = scores.get(category, 0.0) + weight * factor
+    return scores
+
+
+def classify(breadcrumb="", title="", h1="", default=DEFAULT_CATEGORY):
+    """
+    Classifica um produto a partir do breadcrumb, título da página e H1.
+    Retorna uma chave do QuoteCalculator ('tênis', 'camiseta', ...).
+    """
+    scores = {}
+    for source, text in (('breadcrumb', breadcrumb), ('title', title), ('h1', h1)):
+        if text:
+            score(text, SOURCE_WEIGHTS[source], scores=scores)
+    if not scores:
+        return default
+    return min(scores, key=lambda c: (-scores[c], PRIORITY[c]))
+
+
+def classify_text(text, default=DEFAULT_CATEGORY):
+    """Classifica um texto livre (sem separar breadcrumb/título)."""
+    return classify(title=text, default=default)
+
+
+def category_label(category):
+    """Chave do QuoteCalculator -> rótulo legado ('Sneakers', 'T-Shirt', ...)."""
+    return CATEGORY_LABELS.get(category, 'Sneakers')
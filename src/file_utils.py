@@ -0,0 +1,72 @@
+import os
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# Locks em processo por caminho (flock/msvcrt protegem entre processos)
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock_for(path):
+    with _thread_locks_guard:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            lock = _thread_locks[path] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Lock exclusivo entre threads e processos, baseado em um arquivo `.lock`.
+    Usa fcntl.flock no Linux/macOS e msvcrt.locking no Windows.
+    """
+    path = os.path.abspath(path)
+    with _thread_lock_for(path):
+        with open(path, "a+b") as fh:
+            if os.name == "nt":
+                import msvcrt
+                fh.seek(0)
+                while True:
+                    try:
+                        # LK_LOCK tenta por ~10s e então levanta OSError
+                        msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+                try:
+                    yield
+                finally:
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def atomic_write_json(path: str, data, **dump_kwargs):
+    """
+    Grava JSON de forma atômica: escreve num arquivo temporário no mesmo
+    diretório e troca com os.replace, então leitores nunca veem um arquivo
+    pela metade.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -3,24 +3,81 @@ import sys
 import json
 import time
 import re
+import copy
+import asyncio
+import threading
+from contextlib import contextmanager
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+from cache import TTLCache, SQLiteBacking
+from file_utils import file_lock, atomic_write_json
+from tracing import span, traced, annotate
+
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
 
-BASE_URL = "https://www.glin.com.br"
+# GLIN_BASE_URL aponta o cliente para outro servidor (ex.: scripts/fake_glin.py nos benchmarks)
+BASE_URL = os.getenv("GLIN_BASE_URL", "https://www.glin.com.br").rstrip("/")
 GLINPAY_BASE = "https://glinpay.me"
 
+# Por quanto tempo (segundos) uma sessão validada via /api/user é reaproveitada
+# sem nova validação. Expirações antes disso são detectadas pelo 401/403.
+SESSION_TTL = float(os.getenv("GLIN_SESSION_TTL", "900"))
+
+# Status HTTP que indicam sessão expirada / sem permissão
+AUTH_ERROR_STATUS = (401, 403)
+
+
+# Cache de payment-terms por valor em USD. O TTL é curto porque o câmbio
+# (BRL) muda; o link de pagamento também só vale por 1 hora.
+TERMS_CACHE_TTL = float(os.getenv("GLIN_TERMS_CACHE_TTL", "300"))
+TERMS_CACHE_SIZE = int(os.getenv("GLIN_TERMS_CACHE_SIZE", "512"))
+# Caminho opcional de um arquivo SQLite para persistir o cache entre execuções
+TERMS_CACHE_DB = os.getenv("GLIN_TERMS_CACHE_DB")
+
+
+# Links de pagamento valem por 1 hora (câmbio travado, ver format_payment_link_message).
+# Um link já criado para o mesmo valor é reaproveitado enquanto ainda restar
+# pelo menos LINK_REUSE_MARGIN segundos de validade para o cliente pagar.
+LINK_VALIDITY = 3600
+LINK_REUSE_MARGIN = float(os.getenv("GLIN_LINK_REUSE_MARGIN", "900"))
+LINK_REGISTRY_SIZE = int(os.getenv("GLIN_LINK_REGISTRY_SIZE", "512"))
+# SQLite opcional para compartilhar os links entre processos (padrão: o mesmo do cache de terms)
+LINK_REGISTRY_DB = os.getenv("GLIN_LINK_REGISTRY_DB") or TERMS_CACHE_DB
+
+
+# Intervalo (segundos) entre visitas do navegador mantido em background
+KEEPER_INTERVAL = float(os.getenv("GLIN_KEEPER_INTERVAL", "600"))
+
+# Requisições simultâneas máximas no cliente assíncrono
+ASYNC_CONCURRENCY = int(os.getenv("GLIN_CONCURRENCY", "8"))
+
+# Modelo local de payment-terms (opcional): cotações derivadas de uma âncora
+# real, sem chamada de rede. GLIN_LOCAL_TERMS=1 ativa no cliente padrão.
+LOCAL_TERMS_ENABLED = os.getenv("GLIN_LOCAL_TERMS", "0") == "1"
+# Idade máxima (segundos) da âncora antes de recalibrar com a API
+LOCAL_TERMS_MAX_AGE = float(os.getenv("GLIN_LOCAL_TERMS_MAX_AGE", "600"))
+
+
+class GlinAuthError(Exception):
+    """A API rejeitou a sessão atual (401/403)."""
+
 # ──────────────────────────────────────────────
 # Helpers de sessão / cookies
 # ──────────────────────────────────────────────
 
 def _get_state_file():
+    # GLIN_STATE_FILE permite isolar a sessão (ex.: benchmarks contra o servidor falso)
+    state_file = os.getenv("GLIN_STATE_FILE")
+    if state_file:
+        return state_file
     current_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(current_dir, "state.json")
 
 
+@traced("glin.state_read")
 def _load_cookies_from_state():
     """
     Lê o state.json (formato Playwright storage_state) e extrai
@@ -40,44 +97,72 @@ def _load_cookies_from_state():
         return {}
 
 
+def _write_state(state: dict):
+    """Grava o state.json de forma atômica, sob o lock de arquivo."""
+    state_file = _get_state_file()
+    with file_lock(state_file + ".lock"):
+        atomic_write_json(state_file, state, indent=2)
+
+
 def _save_cookies_to_state(cookies_dict):
     """
     Salva um dicionário de cookies de volta ao state.json no formato
     Playwright storage_state (coluna mínima necessária para re-uso).
+    A leitura + escrita acontece sob lock de arquivo e a gravação é atômica.
     """
     state_file = _get_state_file()
-    # Tenta preservar o estado existente (localStorage etc.)
-    existing = {}
-    if os.path.exists(state_file):
-        try:
-            with open(state_file, "r", encoding="utf-8") as f:
-                existing = json.load(f)
-        except Exception:
-            pass
+    with file_lock(state_file + ".lock"):
+        # Tenta preservar o estado existente (localStorage etc.)
+        existing = {}
+        if os.path.exists(state_file):
+            try:
+                with open(state_file, "r", encoding="utf-8") as f:
+                    existing = json.load(f)
+            except Exception:
+                pass
+
+        cookie_list = []
+        for name, value in cookies_dict.items():
+            cookie_list.append({
+                "name": name,
+                "value": value,
+                "domain": ".glin.com.br",
+                "path": "/",
+                "expires": -1,
+                "httpOnly": False,
+                "secure": True,
+                "sameSite": "Lax"
+            })
+
+        existing["cookies"] = cookie_list
+        atomic_write_json(state_file, existing, indent=2)
+
+
+def _state_mtime():
+    """Retorna o mtime do state.json (ou None se não existir)."""
+    try:
+        return os.path.getmtime(_get_state_file())
+    except OSError:
+        return None
 
-    cookie_list = []
-    for name, value in cookies_dict.items():
-        cookie_list.append({
-            "name": name,
-            "value": value,
-            "domain": ".glin.com.br",
-            "path": "/",
-            "expires": -1,
-            "httpOnly": False,
-            "secure": True,
-            "sameSite": "Lax"
-        })
-
-    existing["cookies"] = cookie_list
-    with open(state_file, "w", encoding="utf-8") as f:
-        json.dump(existing, f, indent=2)
-
-
-def _build_session(cookies: dict) -> requests.Session:
-    """Cria uma requests.Session com os cookies e headers padrão da Glin."""
+
+def _build_session(cookies: dict, pool_size: int = 10) -> requests.Session:
+    """
+    Cria uma requests.Session com os cookies e headers padrão da Glin.
+    A sessão mantém um pool de conexões keep-alive (reaproveita TCP+TLS).
+    """
     session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     session.cookies.update(cookies)
-    session.headers.update({
+    session.headers.update(_default_headers())
+    return session
+
+
+def _default_headers() -> dict:
+    """Headers padrão das chamadas à API da Glin."""
+    return {
         "User-Agent": (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
             "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -87,14 +172,77 @@ def _build_session(cookies: dict) -> requests.Session:
         "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
         "Referer": f"{BASE_URL}/merchant/dashboard/charge",
         "Origin": BASE_URL,
-    })
-    return session
+    }
 
 
 # ──────────────────────────────────────────────
 # Login via Playwright (somente quando necessário)
 # ──────────────────────────────────────────────
 
+def _glin_credentials(log):
+    """Retorna (email, senha) do .env, ou (None, None) com log de erro."""
+    email = os.getenv("GLIN_EMAIL")
+    password = os.getenv("GLIN_PASSWORD")
+
+    if not email or not password:
+        log("Erro: GLIN_EMAIL ou GLIN_PASSWORD não definidos no .env")
+        return None, None
+    return email, password
+
+
+def _launch_browser(p, log):
+    """Lança o navegador headless adequado à plataforma. Retorna None em falha."""
+    try:
+        if sys.platform.startswith("linux"):
+            log("Ambiente Linux detectado. Usando Chromium com sandbox desativado...")
+            return p.chromium.launch(
+                headless=True,
+                args=["--no-sandbox", "--disable-dev-shm-usage"]
+            )
+        try:
+            return p.chromium.launch(headless=True, channel="msedge")
+        except Exception:
+            return p.chromium.launch(headless=True, channel="chrome")
+    except Exception as e:
+        log(f"Erro ao lançar navegador: {e}")
+        return None
+
+
+def _login_in_page(context, page, email, password, log) -> dict:
+    """
+    Abre o dashboard na página dada, faz login se for redirecionado,
+    salva o state.json e retorna os cookies. Levanta exceção em falha.
+    """
+    page.goto(f"{BASE_URL}/merchant/dashboard/charge", timeout=60000)
+
+    if "login" in page.url:
+        log("Preenchendo credenciais...")
+        try:
+            page.wait_for_load_state("networkidle", timeout=10000)
+        except Exception:
+            pass
+
+        page.locator("#email").fill(email)
+        page.get_by_placeholder("Senha").fill(password)
+        page.locator("#submit-btn").click()
+
+        try:
+            page.wait_for_url("**/merchant/dashboard/charge", timeout=60000)
+        except Exception as e:
+            log(f"Timeout aguardando dashboard: {page.url}")
+            raise e
+
+    # Salva estado (gravação atômica, sob lock)
+    _write_state(context.storage_state())
+
+    # Extrai cookies para retornar
+    cookies = {}
+    for c in context.cookies():
+        cookies[c["name"]] = c["value"]
+    return cookies
+
+
+@traced("glin.login")
 def _playwright_login(log):
     """
     Realiza login no Glin via Playwright e salva o state.json
@@ -106,11 +254,8 @@ def _playwright_login(log):
         log("Erro: playwright não instalado. Execute: pip install playwright")
         return {}
 
-    email = os.getenv("GLIN_EMAIL")
-    password = os.getenv("GLIN_PASSWORD")
-
-    if not email or not password:
-        log("Erro: GLIN_EMAIL ou GLIN_PASSWORD não definidos no .env")
+    email, password = _glin_credentials(log)
+    if not email:
         return {}
 
     log("Sessão expirada. Fazendo login via navegador (uma só vez)...")
@@ -119,20 +264,8 @@ def _playwright_login(log):
         state_file = _get_state_file()
 
         # Lança browser
-        try:
-            if sys.platform.startswith("linux"):
-                log("Ambiente Linux detectado. Usando Chromium com sandbox desativado...")
-                browser = p.chromium.launch(
-                    headless=True,
-                    args=["--no-sandbox", "--disable-dev-shm-usage"]
-                )
-            else:
-                try:
-                    browser = p.chromium.launch(headless=True, channel="msedge")
-                except Exception:
-                    browser = p.chromium.launch(headless=True, channel="chrome")
-        except Exception as e:
-            log(f"Erro ao lançar navegador: {e}")
+        browser = _launch_browser(p, log)
+        if browser is None:
             return {}
 
         context = browser.new_context(
@@ -141,33 +274,8 @@ def _playwright_login(log):
         page = context.new_page()
 
         try:
-            page.goto(f"{BASE_URL}/merchant/dashboard/charge", timeout=60000)
-
-            if "login" in page.url:
-                log("Preenchendo credenciais...")
-                try:
-                    page.wait_for_load_state("networkidle", timeout=10000)
-                except Exception:
-                    pass
-
-                page.locator("#email").fill(email)
-                page.get_by_placeholder("Senha").fill(password)
-                page.locator("#submit-btn").click()
-
-                try:
-                    page.wait_for_url("**/merchant/dashboard/charge", timeout=60000)
-                except Exception as e:
-                    log(f"Timeout aguardando dashboard: {page.url}")
-                    raise e
-
-            # Salva estado
-            context.storage_state(path=state_file)
+            cookies = _login_in_page(context, page, email, password, log)
             log("Login realizado e sessão salva com sucesso.")
-
-            # Extrai cookies para retornar
-            cookies = {}
-            for c in context.cookies():
-                cookies[c["name"]] = c["value"]
             return cookies
 
         except Exception as e:
@@ -177,10 +285,56 @@ def _playwright_login(log):
             browser.close()
 
 
+# Login coalescido: só um navegador por vez; quem espera reaproveita os cookies
+_login_lock = threading.Lock()
+_login_generation = 0
+_last_login_cookies = {}
+
+
+@traced("glin.coalesced_login")
+def _coalesced_login(log, state_mtime_seen=None):
+    """
+    Login via navegador com "single-flight".
+
+    Apenas uma chamada executa `_playwright_login` por vez (entre threads e,
+    via lock de arquivo, entre processos). Quem estava esperando e percebe
+    que outro login terminou nesse meio tempo (nova geração neste processo
+    ou state.json mais novo que `state_mtime_seen`) reaproveita os cookies
+    em vez de abrir outro Chromium.
+    """
+    global _login_generation, _last_login_cookies
+    generation_seen = _login_generation
+    with _login_lock:
+        if _login_generation != generation_seen and _last_login_cookies:
+            log("Login já realizado por outra chamada. Reutilizando sessão.")
+            return dict(_last_login_cookies)
+
+        with file_lock(_get_state_file() + ".login.lock"):
+            mtime = _state_mtime()
+            if state_mtime_seen is not None and mtime is not None and mtime != state_mtime_seen:
+                cookies = _load_cookies_from_state()
+                if cookies:
+                    log("Sessão renovada por outro processo. Reutilizando cookies.")
+                    return cookies
+
+            keeper = _browser_keeper
+            if keeper is not None and keeper.is_running():
+                # Navegador já aquecido em background: sem cold start
+                cookies = keeper.refresh(log)
+            else:
+                cookies = _playwright_login(log)
+
+        if cookies:
+            _last_login_cookies = dict(cookies)
+            _login_generation += 1
+        return cookies
+
+
 # ──────────────────────────────────────────────
 # Chamadas REST da Glin
 # ──────────────────────────────────────────────
 
+@traced("glin.validate_session")
 def _validate_session(session: requests.Session, log) -> str | None:
     """
     Chama GET /api/user para validar a sessão.
@@ -204,38 +358,49 @@ def _validate_session(session: requests.Session, log) -> str | None:
         return None
 
 
-def _fetch_payment_terms(session: requests.Session, slug: str, usd_amount: float, log):
+def _payment_terms_url(slug: str, usd_amount: float) -> str:
+    return f"{BASE_URL}/app/merchants/{slug}/payment-terms/USD{usd_amount:.2f}"
+
+
+def _payment_links_url(slug: str) -> str:
+    return f"{BASE_URL}/app/merchants/{slug}/payment-links"
+
+
+def _payment_link_payload(usd_amount: float) -> dict:
+    return {
+        "amount": round(usd_amount, 2),
+        "currency": "USD",
+        "unique": False
+    }
+
+
+def _handle_payment_terms_response(resp, log):
     """
-    GET /app/merchants/{slug}/payment-terms/USD{valor}
+    Interpreta o response de payment-terms (requests ou httpx).
     Retorna o dict de paymentTerms ou None.
+    Levanta GlinAuthError se a sessão foi rejeitada (401/403).
     """
-    url = f"{BASE_URL}/app/merchants/{slug}/payment-terms/USD{usd_amount:.2f}"
-    log(f"Consultando termos de pagamento: USD {usd_amount:.2f}...")
+    if resp.status_code in AUTH_ERROR_STATUS:
+        raise GlinAuthError(f"payment-terms retornou status {resp.status_code}")
     try:
-        resp = session.get(url, timeout=15)
         if resp.status_code == 200:
             return resp.json().get("paymentTerms", resp.json())
         log(f"Erro ao buscar payment-terms (status {resp.status_code}): {resp.text[:200]}")
         return None
     except Exception as e:
-        log(f"Erro na requisição payment-terms: {e}")
+        log(f"Erro ao ler payment-terms: {e}")
         return None
 
 
-def _create_payment_link(session: requests.Session, slug: str, usd_amount: float, log):
+def _handle_payment_link_response(resp, slug: str, usd_amount: float, log):
     """
-    POST /app/merchants/{slug}/payment-links
+    Interpreta o response de payment-links (requests ou httpx).
     Retorna a URL do link ou None.
+    Levanta GlinAuthError se a sessão foi rejeitada (401/403).
     """
-    url = f"{BASE_URL}/app/merchants/{slug}/payment-links"
-    payload = {
-        "amount": round(usd_amount, 2),
-        "currency": "USD",
-        "unique": False
-    }
-    log("Gerando link de pagamento...")
+    if resp.status_code in AUTH_ERROR_STATUS:
+        raise GlinAuthError(f"payment-links retornou status {resp.status_code}")
     try:
-        resp = session.post(url, json=payload, timeout=15)
         if resp.status_code in (200, 201):
             data = resp.json()
             link_id = data.get("id")
@@ -247,9 +412,41 @@ def _create_payment_link(session: requests.Session, slug: str, usd_amount: float
             return None
         log(f"Erro ao gerar link (status {resp.status_code}): {resp.text[:200]}")
         return None
+    except Exception as e:
+        log(f"Erro ao ler payment-links: {e}")
+        return None
+
+
+@traced("glin.payment_terms")
+def _fetch_payment_terms(session: requests.Session, slug: str, usd_amount: float, log):
+    """
+    GET /app/merchants/{slug}/payment-terms/USD{valor}
+    Retorna o dict de paymentTerms ou None.
+    Levanta GlinAuthError se a sessão foi rejeitada (401/403).
+    """
+    log(f"Consultando termos de pagamento: USD {usd_amount:.2f}...")
+    try:
+        resp = session.get(_payment_terms_url(slug, usd_amount), timeout=15)
+    except Exception as e:
+        log(f"Erro na requisição payment-terms: {e}")
+        return None
+    return _handle_payment_terms_response(resp, log)
+
+
+@traced("glin.payment_link")
+def _create_payment_link(session: requests.Session, slug: str, usd_amount: float, log):
+    """
+    POST /app/merchants/{slug}/payment-links
+    Retorna a URL do link ou None.
+    Levanta GlinAuthError se a sessão foi rejeitada (401/403).
+    """
+    log("Gerando link de pagamento...")
+    try:
+        resp = session.post(_payment_links_url(slug), json=_payment_link_payload(usd_amount), timeout=15)
     except Exception as e:
         log(f"Erro na requisição payment-links: {e}")
         return None
+    return _handle_payment_link_response(resp, slug, usd_amount, log)
 
 
 # ──────────────────────────────────────────────
@@ -320,60 +517,849 @@ def _format_brl(value: float) -> str:
 
 
 # ──────────────────────────────────────────────
-# Função pública principal (interface compatível)
+# Modelo local de payment-terms
 # ──────────────────────────────────────────────
 
-def get_glin_quote(usd_amount: float, generate_link: bool = False, log_func=None) -> dict | None:
+class LocalTermsModel:
     """
-    Obtém cotação Pix + Cartão da Glin via API REST direta.
+    Deriva payment-terms localmente a partir de uma resposta real (âncora).
 
-    Retorna um dicionário com:
-        - pix: str          → "R$ 10.542,37"
-        - card_1x: str      → "R$ 10.887,21"
-        - installments: list → [{"n": 1, "value": "1x R$ ...", "total": "Total: R$ ..."}, ...]
-        - payment_link: str | None
+    Os valores da Glin são o valor em USD vezes uma taxa de câmbio fixa
+    (Pix) e fatores fixos por número de parcelas (cartão). `calibrate`
+    extrai esses fatores de um `paymentTerms` real; `predict` gera um
+    `paymentTerms` no mesmo formato para qualquer outro valor, sem rede.
 
-    Retorna None em caso de falha.
+    A âncora expira após `max_age` segundos. Ao recalibrar, o desvio entre
+    a previsão do modelo e a resposta real fica em `last_drift`.
     """
+
+    def __init__(self, max_age: float = LOCAL_TERMS_MAX_AGE):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.anchor_amount = None
+        self.anchored_at = 0.0
+        self.pix_rate = None
+        self.plans = {}  # n -> (fator da parcela, fator do total)
+        self.last_drift = None
+
+    @property
+    def ready(self) -> bool:
+        return self.pix_rate is not None or bool(self.plans)
+
+    def is_stale(self) -> bool:
+        return not self.ready or time.monotonic() - self.anchored_at >= self.max_age
+
+    def calibrate(self, usd_amount: float, terms: dict):
+        """Calibra taxa de câmbio e fatores por parcela a partir de um paymentTerms real."""
+        if usd_amount <= 0:
+            return
+        pix_rate = None
+        plans = {}
+        for option in terms.get("options", []):
+            method = option.get("method", "")
+            if method == "pix" and option.get("totalDueAmount") is not None:
+                pix_rate = option["totalDueAmount"] / usd_amount
+            elif method == "card":
+                for plan in option.get("installmentPlans", []):
+                    n = plan.get("installments", 0)
+                    inst_amount = plan.get("installmentAmount")
+                    if inst_amount is None:
+                        continue
+                    total_amount = plan.get("totalAmount")
+                    plans[n] = (
+                        inst_amount / usd_amount,
+                        total_amount / usd_amount if total_amount else None,
+                    )
+        with self._lock:
+            self.pix_rate = pix_rate
+            self.plans = plans
+            self.anchor_amount = usd_amount
+            self.anchored_at = time.monotonic()
+
+    def predict(self, usd_amount: float) -> dict:
+        """Retorna um paymentTerms (mesmo formato da API) para `usd_amount`."""
+        with self._lock:
+            pix_rate = self.pix_rate
+            plans = dict(self.plans)
+
+        options = []
+        if pix_rate is not None:
+            options.append({"method": "pix", "totalDueAmount": round(usd_amount * pix_rate, 2)})
+        if plans:
+            installment_plans = []
+            for n, (inst_factor, total_factor) in sorted(plans.items()):
+                installment_plans.append({
+                    "installments": n,
+                    "installmentAmount": round(usd_amount * inst_factor, 2),
+                    "totalAmount": round(usd_amount * total_factor, 2) if total_factor else None,
+                })
+            options.append({"method": "card", "installmentPlans": installment_plans})
+        return {"options": options}
+
+    def drift(self, usd_amount: float, terms: dict) -> float:
+        """Maior desvio relativo entre a previsão do modelo e um paymentTerms real."""
+        predicted = _terms_amounts(self.predict(usd_amount))
+        worst = 0.0
+        for key, real in _terms_amounts(terms).items():
+            model = predicted.get(key)
+            if model is None or not real:
+                continue
+            worst = max(worst, abs(model - real) / abs(real))
+        return worst
+
+    def reanchor(self, usd_amount: float, terms: dict, log) -> float | None:
+        """Mede o desvio contra a resposta real (se já calibrado) e recalibra."""
+        drift = None
+        if self.ready:
+            drift = self.drift(usd_amount, terms)
+            self.last_drift = drift
+            log(f"Modelo local recalibrado. Desvio vs API: {drift * 100:.3f}%")
+        self.calibrate(usd_amount, terms)
+        return drift
+
+
+def _terms_amounts(terms: dict) -> dict:
+    """Extrai os valores numéricos de um paymentTerms: {('pix',), ('card', n, campo)}."""
+    amounts = {}
+    for option in terms.get("options", []):
+        method = option.get("method", "")
+        if method == "pix" and option.get("totalDueAmount") is not None:
+            amounts[("pix",)] = option["totalDueAmount"]
+        elif method == "card":
+            for plan in option.get("installmentPlans", []):
+                n = plan.get("installments", 0)
+                for field in ("installmentAmount", "totalAmount"):
+                    if plan.get(field) is not None:
+                        amounts[("card", n, field)] = plan[field]
+    return amounts
+
+
+# ──────────────────────────────────────────────
+# Registro de links de pagamento (reuso dentro da validade)
+# ──────────────────────────────────────────────
+
+class PaymentLinkRegistry:
+    """
+    Links de pagamento já criados, por merchant e valor em centavos.
+
+    Evita um POST em payment-links (e um clone no dashboard do merchant)
+    quando o mesmo valor é pedido de novo: o link existente é devolvido
+    enquanto tiver ao menos `margin` segundos dos `validity` segundos de
+    validade. Usa o TTLCache (memória + SQLite opcional).
+    """
+
+    def __init__(self, validity: float = LINK_VALIDITY, margin: float = LINK_REUSE_MARGIN,
+                 maxsize: int = LINK_REGISTRY_SIZE, db_path: str = LINK_REGISTRY_DB):
+        self.validity = validity
+        self.margin = margin
+        backing = SQLiteBacking(db_path, table="payment_links") if db_path else None
+        self._cache = TTLCache(maxsize=maxsize, ttl=max(validity - margin, 0), backing=backing)
+        self.reused = 0
+        self.created = 0
+
+    def get(self, slug: str, usd_amount: float):
+        """Retorna (link, idade em segundos) de um link ainda reaproveitável, ou None."""
+        entry = self._cache.get(_terms_cache_key(slug, usd_amount))
+        if entry is None:
+            return None
+        age = time.time() - entry["created_at"]
+        if age >= self.validity - self.margin:
+            return None
+        self.reused += 1
+        return entry["link"], age
+
+    def put(self, slug: str, usd_amount: float, link: str):
+        if link:
+            self.created += 1
+            self._cache.set(_terms_cache_key(slug, usd_amount), {"link": link, "created_at": time.time()})
+
+    def invalidate(self, slug: str = None, usd_amount: float = None):
+        self._cache.invalidate(_terms_cache_key(slug, usd_amount) if slug else None)
+
+    def stats(self) -> dict:
+        return {"reused": self.reused, "created": self.created, **self._cache.stats()}
+
+
+class KeyedLocks:
+    """
+    Um lock por chave (ex.: valor do link), criado sob demanda e descartado
+    quando ninguém mais o usa. Chamadas com chaves diferentes não esperam
+    umas pelas outras. `factory` é threading.Lock ou asyncio.Lock.
+    """
+
+    def __init__(self, factory=threading.Lock):
+        self._factory = factory
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def lock_for(self, key):
+        """Entrega o lock da chave (sem adquiri-lo), mantendo-o vivo durante o bloco."""
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [self._factory(), 0]
+            entry[1] += 1
+        try:
+            yield entry[0]
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def __len__(self):
+        with self._guard:
+            return len(self._locks)
+
+
+# ──────────────────────────────────────────────
+# Cliente persistente (pool de conexões + slug em cache)
+# ──────────────────────────────────────────────
+
+def _make_logger(log_func):
+    """Retorna uma função de log que usa `log_func` ou print."""
     def log(msg):
         if log_func:
             log_func(msg)
         else:
             print(msg)
+    return log
 
-    # 1. Carrega cookies salvos
-    cookies = _load_cookies_from_state()
-    session = _build_session(cookies)
 
-    # 2. Valida sessão — se inválida, refaz login
-    slug = _validate_session(session, log)
+class GlinClient:
+    """
+    Cliente Glin de longa duração e thread-safe.
+
+    Mantém uma única requests.Session (pool keep-alive para glin.com.br),
+    guarda o slug do merchant já validado e só recarrega os cookies do
+    state.json quando eles ficam desatualizados (arquivo alterado por outro
+    processo ou sessão rejeitada pela API).
+
+    A validação via /api/user vale por `session_ttl` segundos. Dentro desse
+    prazo cada cotação custa uma única requisição; se a API responder 401/403
+    a sessão é revalidada (com login via navegador se preciso) e a chamada é
+    repetida uma vez.
+
+    Os payment-terms já parseados ficam em `terms_cache` (LRU + TTL, com
+    SQLite opcional), indexados por merchant e valor arredondado em centavos.
 
-    if not slug:
-        log("Sessão inválida. Iniciando login...")
-        cookies = _playwright_login(log)
+    Com `local_model` (LocalTermsModel), valores fora do cache são derivados
+    localmente da última âncora real; a API só é chamada para recalibrar.
+
+    Links de pagamento ficam em `link_registry` (PaymentLinkRegistry): o
+    mesmo valor pedido de novo dentro da validade reaproveita o link.
+    """
+
+    def __init__(self, pool_size: int = 10, session_ttl: float = SESSION_TTL,
+                 terms_cache: TTLCache = None, local_model: LocalTermsModel = None,
+                 link_registry: PaymentLinkRegistry = None):
+        self.pool_size = pool_size
+        self.session_ttl = session_ttl
+        if terms_cache is None:
+            backing = SQLiteBacking(TERMS_CACHE_DB, table="payment_terms") if TERMS_CACHE_DB else None
+            terms_cache = TTLCache(maxsize=TERMS_CACHE_SIZE, ttl=TERMS_CACHE_TTL, backing=backing)
+        self.terms_cache = terms_cache
+        if local_model is None and LOCAL_TERMS_ENABLED:
+            local_model = LocalTermsModel()
+        self.local_model = local_model
+        self.link_registry = link_registry or PaymentLinkRegistry()
+        # Serializa a criação de links por valor: dois cliques iguais geram um só
+        # POST, valores diferentes seguem em paralelo
+        self._link_locks = KeyedLocks(threading.Lock)
+        self._lock = threading.RLock()
+        self._session = None
+        self._slug = None
+        self._validated_at = 0.0
+        self._state_mtime = None
+        self._pending_lock = threading.Lock()
+        self._pending_cookies = None
+
+    # ── Estado da sessão ──
+
+    def _load_session(self):
+        """(Re)cria a sessão a partir do state.json. Requer o lock."""
+        if self._session is not None:
+            self._session.close()
+        self._session = _build_session(_load_cookies_from_state(), self.pool_size)
+        self._state_mtime = _state_mtime()
+        self._slug = None
+
+    def _set_cookies(self, cookies: dict):
+        """Substitui os cookies da sessão mantendo o pool de conexões. Requer o lock."""
+        self._session.cookies.clear()
+        self._session.cookies.update(cookies)
+        self._state_mtime = _state_mtime()
+        self._slug = None
+
+    def update_cookies(self, cookies: dict):
+        """
+        Recebe cookies renovados de fora (ex.: GlinBrowserKeeper). Eles são
+        aplicados na próxima chamada, sem perder o pool de conexões nem o
+        slug validado. Não bloqueia: quem está com o lock da sessão pode
+        estar justamente esperando o keeper.
+        """
+        if cookies:
+            with self._pending_lock:
+                self._pending_cookies = dict(cookies)
+
+    def _apply_pending_cookies(self):
+        """Aplica cookies recebidos via update_cookies. Requer o lock."""
+        with self._pending_lock:
+            cookies, self._pending_cookies = self._pending_cookies, None
         if not cookies:
-            log("Falha no login. Abortando.")
+            return
+        if self._session is None:
+            self._load_session()
+        slug, validated_at = self._slug, self._validated_at
+        self._set_cookies(cookies)
+        self._slug, self._validated_at = slug, validated_at
+
+    @property
+    def merchant_slug(self) -> str | None:
+        """Slug do merchant da sessão validada (None se ainda não há sessão válida)."""
+        return self._slug
+
+    def invalidate(self):
+        """Descarta o slug em cache; a próxima chamada valida a sessão de novo."""
+        with self._lock:
+            self._slug = None
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._slug = None
+
+    def ensure_session(self, log_func=None):
+        """
+        Garante uma sessão válida e retorna (session, slug), ou (None, None)
+        se não foi possível autenticar nem via login.
+        """
+        log = _make_logger(log_func)
+        with self._lock:
+            self._apply_pending_cookies()
+            # Cookies desatualizados: o state.json mudou desde a última carga
+            if self._session is None or _state_mtime() != self._state_mtime:
+                self._load_session()
+
+            if self._slug and time.monotonic() - self._validated_at < self.session_ttl:
+                return self._session, self._slug
+
+            slug = _validate_session(self._session, log)
+            if not slug:
+                log("Sessão inválida. Iniciando login...")
+                cookies = _coalesced_login(log, self._state_mtime)
+                if not cookies:
+                    log("Falha no login. Abortando.")
+                    return None, None
+                self._set_cookies(cookies)
+                slug = _validate_session(self._session, log)
+                if not slug:
+                    log("Sessão inválida mesmo após login. Abortando.")
+                    return None, None
+
+            self._slug = slug
+            self._validated_at = time.monotonic()
+            return self._session, slug
+
+    def _call(self, func, usd_amount, log):
+        """
+        Executa func(session, slug, usd_amount, log) com uma sessão válida.
+        Em 401/403 invalida o cache, revalida e tenta mais uma vez.
+        Retorna (resultado, slug).
+        """
+        session, slug = self.ensure_session(log)
+        if not slug:
+            return None, None
+        try:
+            return func(session, slug, usd_amount, log), slug
+        except GlinAuthError as e:
+            log(f"Sessão rejeitada ({e}). Revalidando...")
+            self.invalidate()
+
+        session, slug = self.ensure_session(log)
+        if not slug:
+            return None, None
+        try:
+            return func(session, slug, usd_amount, log), slug
+        except GlinAuthError as e:
+            log(f"Sessão rejeitada novamente ({e}). Abortando.")
+            self.invalidate()
+            return None, slug
+
+    # ── Operações ──
+
+    def get_quote(self, usd_amount: float, generate_link: bool = False, log_func=None) -> dict | None:
+        """Mesmo contrato de `get_glin_quote`, reaproveitando sessão e slug."""
+        log = _make_logger(log_func)
+        with span("glin.quote", log_func=log, amount=round(usd_amount, 2), link=generate_link):
+            return self._get_quote(usd_amount, generate_link, log)
+
+    def _get_quote(self, usd_amount: float, generate_link: bool, log) -> dict | None:
+        session, slug = self.ensure_session(log)
+        if not slug:
             return None
-        session = _build_session(cookies)
-        slug = _validate_session(session, log)
+
+        # 1. Cache de payment-terms (mesmo valor cotado há pouco)
+        key = _terms_cache_key(slug, usd_amount)
+        cached = self.terms_cache.get(key)
+        model = self.local_model
+        if cached is not None:
+            log(f"Cotação em cache para USD {usd_amount:.2f}.")
+            annotate(terms="cache")
+            result = copy.deepcopy(cached)
+        elif model is not None and not model.is_stale():
+            # 2a. Modelo local calibrado: sem chamada de rede
+            log(f"Cotação derivada localmente para USD {usd_amount:.2f}.")
+            annotate(terms="local")
+            result = _parse_payment_terms(model.predict(usd_amount), log)
+        else:
+            # 2b. Consulta payment-terms via API e parseia
+            annotate(terms="api")
+            terms, slug = self._call(_fetch_payment_terms, usd_amount, log)
+            if not terms:
+                return None
+            if model is not None:
+                model.reanchor(usd_amount, terms, log)
+            result = _parse_payment_terms(terms, log)
+            self.terms_cache.set(_terms_cache_key(slug, usd_amount), copy.deepcopy(result))
+
+        # 3. Gera link de pagamento (opcional), reaproveitando um ainda válido
+        if generate_link:
+            result["payment_link"] = self.get_payment_link(usd_amount, log)
+
+        return result
+
+    def link_lock(self, usd_amount: float):
+        """
+        Lock (threading.Lock) da criação de link para o valor, compartilhado
+        com os AsyncGlinClient deste cliente. Uso: `with client.link_lock(v) as lock:`.
+        """
+        return self._link_locks.lock_for(f"USD{usd_amount:.2f}")
+
+    def get_payment_link(self, usd_amount: float, log) -> str | None:
+        """Link de pagamento para o valor: reaproveitado do registro ou criado via POST."""
+        with self.link_lock(usd_amount) as link_lock, link_lock:
+            _, slug = self.ensure_session(log)
+            if not slug:
+                return None
+            reused = self.link_registry.get(slug, usd_amount)
+            if reused is not None:
+                link, age = reused
+                log(f"Link reaproveitado (criado há {age / 60:.0f} min): {link}")
+                annotate(link="reused")
+                return link
+            link, slug = self._call(_create_payment_link, usd_amount, log)
+            if link:
+                self.link_registry.put(slug, usd_amount, link)
+            return link
+
+
+def _terms_cache_key(slug: str, usd_amount: float) -> str:
+    """Chave do cache de payment-terms: merchant + valor em centavos."""
+    return f"{slug}:USD{usd_amount:.2f}"
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> GlinClient:
+    """Retorna o GlinClient compartilhado pelo processo (criado sob demanda)."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = GlinClient()
+        return _default_client
+
+
+def reset_client(clear_state: bool = False):
+    """
+    Descarta o GlinClient compartilhado e o navegador em background; o
+    próximo get_client() cria um novo. Com `clear_state`, apaga também os
+    cookies do state.json (ex.: GLIN_EMAIL/GLIN_PASSWORD trocados), senão a
+    sessão da conta anterior seria reaproveitada.
+    """
+    global _default_client, _last_login_cookies
+    stop_browser_keeper()
+    with _default_client_lock:
+        client, _default_client = _default_client, None
+    if client is not None:
+        client.close()
+    if clear_state:
+        state_file = _get_state_file()
+        with file_lock(state_file + ".lock"):
+            try:
+                os.remove(state_file)
+            except FileNotFoundError:
+                pass
+        with _login_lock:
+            _last_login_cookies = {}
+
+
+# ──────────────────────────────────────────────
+# Navegador pré-aquecido em background (fallback de login)
+# ──────────────────────────────────────────────
+
+class GlinBrowserKeeper:
+    """
+    Mantém um único Chromium headless logado na Glin em uma thread própria.
+
+    A cada `interval` segundos visita /merchant/dashboard/charge (refazendo
+    o login se preciso) e exporta os cookies renovados para o state.json e
+    para o GlinClient antes que expirem. Quando a sessão cai, o login passa
+    a ser feito por este navegador já aberto, sem o custo de iniciar o
+    Playwright/Chromium no caminho do usuário. A memória fica limitada a
+    uma instância de navegador.
+
+    O Playwright síncrono é preso à thread que o criou, então todo acesso ao
+    navegador acontece na thread do keeper; `refresh()` apenas pede uma
+    visita imediata e espera o resultado.
+    """
+
+    def __init__(self, client: GlinClient = None, interval: float = KEEPER_INTERVAL, log_func=None):
+        self.client = client
+        self.interval = interval
+        self.log = _make_logger(log_func)
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._done = threading.Condition()
+        self._round = 0
+        self._last_cookies = {}
+        self.last_refresh = None
+
+    def start(self):
+        if self.is_running():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="glin-browser-keeper", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def refresh(self, log=None, timeout: float = 90) -> dict:
+        """Pede uma visita imediata ao dashboard e retorna os cookies resultantes."""
+        log = log or self.log
+        log("Renovando sessão pelo navegador em background...")
+        with self._done:
+            target = self._round + 1
+            self._wake.set()
+            finished = self._done.wait_for(lambda: self._round >= target or not self.is_running(), timeout)
+        if not finished or not self.is_running():
+            log("Navegador em background não respondeu a tempo.")
+            return {}
+        return dict(self._last_cookies)
+
+    def _run(self):
+        try:
+            from playwright.sync_api import sync_playwright
+        except ImportError:
+            self.log("Erro: playwright não instalado. Execute: pip install playwright")
+            return
+
+        email, password = _glin_credentials(self.log)
+        if not email:
+            return
+
+        with sync_playwright() as p:
+            browser = _launch_browser(p, self.log)
+            if browser is None:
+                return
+            try:
+                state_file = _get_state_file()
+                context = browser.new_context(
+                    storage_state=state_file if os.path.exists(state_file) else None
+                )
+                page = context.new_page()
+                while not self._stop.is_set():
+                    self._touch(context, page, email, password)
+                    self._wake.wait(self.interval)
+                    self._wake.clear()
+            finally:
+                browser.close()
+                with self._done:
+                    self._done.notify_all()
+
+    def _touch(self, context, page, email, password):
+        """Visita o dashboard, exporta cookies e acorda quem espera em refresh()."""
+        cookies = {}
+        try:
+            cookies = _login_in_page(context, page, email, password, self.log)
+            self.last_refresh = time.time()
+            client = self.client or get_client()
+            client.update_cookies(cookies)
+        except Exception as e:
+            self.log(f"Erro ao renovar sessão em background: {e}")
+        with self._done:
+            self._last_cookies = cookies
+            self._round += 1
+            self._done.notify_all()
+
+
+_browser_keeper = None
+
+
+def start_browser_keeper(client: GlinClient = None, interval: float = KEEPER_INTERVAL,
+                         log_func=None) -> GlinBrowserKeeper:
+    """Inicia (uma vez por processo) o navegador Glin pré-aquecido em background."""
+    global _browser_keeper
+    with _default_client_lock:
+        if _browser_keeper is None or not _browser_keeper.is_running():
+            _browser_keeper = GlinBrowserKeeper(client, interval, log_func).start()
+        return _browser_keeper
+
+
+def stop_browser_keeper():
+    global _browser_keeper
+    with _default_client_lock:
+        keeper, _browser_keeper = _browser_keeper, None
+    if keeper is not None:
+        keeper.stop()
+
+
+# ──────────────────────────────────────────────
+# Cliente assíncrono (httpx) para cotações em lote
+# ──────────────────────────────────────────────
+
+class AsyncGlinClient:
+    """
+    Contraparte asyncio do GlinClient, baseada em httpx.
+
+    Um único httpx.AsyncClient (um pool de conexões) atende todas as
+    requisições; payment-terms e payment-links são disparados em paralelo
+    com no máximo `concurrency` requisições simultâneas. Sessão, slug,
+    login e cache de payment-terms vêm do GlinClient síncrono, então o
+    resultado de cada valor é idêntico ao de `get_glin_quote`.
+    """
+
+    def __init__(self, client: GlinClient = None, concurrency: int = ASYNC_CONCURRENCY):
+        self.client = client or get_client()
+        self.concurrency = concurrency
+        self._http = None
+        self._session = None
+        self._slug = None
+        self._generation = 0
+        self._refresh_lock = None
+        self._link_locks = None
+
+    async def open(self, log_func=None) -> bool:
+        """Abre o pool httpx com a sessão validada. Retorna False em falha."""
+        log = _make_logger(log_func)
+        try:
+            import httpx
+        except ImportError:
+            log("Erro: httpx não instalado. Execute: pip install httpx")
+            return False
+
+        self._refresh_lock = asyncio.Lock()
+        self._link_locks = KeyedLocks(asyncio.Lock)
+        self._http = httpx.AsyncClient(
+            headers=_default_headers(),
+            timeout=15,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+        )
+        return await self._sync_session(log)
+
+    @property
+    def merchant_slug(self) -> str | None:
+        """Slug do merchant sincronizado do GlinClient (None se a sessão caiu)."""
+        return self._slug
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _sync_session(self, log) -> bool:
+        """Copia cookies e slug do GlinClient (validando/logando se preciso)."""
+        session, slug = await asyncio.to_thread(self.client.ensure_session, log)
         if not slug:
-            log("Sessão inválida mesmo após login. Abortando.")
+            self._slug = None
+            return False
+        if session is not self._session or slug != self._slug:
+            self._http.cookies.clear()
+            self._http.cookies.update(dict(session.cookies))
+            self._session = session
+        self._slug = slug
+        self._generation += 1
+        return True
+
+    async def _refresh(self, generation_seen, log) -> bool:
+        """Revalida a sessão após 401/403 (uma vez para todas as tarefas)."""
+        async with self._refresh_lock:
+            if self._slug and self._generation != generation_seen:
+                # Outra tarefa já revalidou enquanto esperávamos
+                return True
+            self.client.invalidate()
+            self._session = None
+            return await self._sync_session(log)
+
+    async def _call(self, request, handle, log):
+        """Executa request(slug) e handle(resp, slug); em 401/403 revalida e repete uma vez."""
+        for attempt in range(2):
+            slug = self._slug
+            generation = self._generation
+            if not slug:
+                return None, None
+            try:
+                resp = await request(slug)
+            except Exception as e:
+                log(f"Erro na requisição: {e}")
+                return None, slug
+            try:
+                return handle(resp, slug), slug
+            except GlinAuthError as e:
+                if attempt:
+                    log(f"Sessão rejeitada novamente ({e}). Abortando.")
+                    return None, slug
+                log(f"Sessão rejeitada ({e}). Revalidando...")
+                if not await self._refresh(generation, log):
+                    return None, None
+        return None, None
+
+    async def get_quote(self, usd_amount: float, generate_link: bool = False, log_func=None) -> dict | None:
+        """Versão assíncrona de GlinClient.get_quote (mesmo formato de retorno)."""
+        log = _make_logger(log_func)
+        with span("glin.quote", log_func=log, amount=round(usd_amount, 2), link=generate_link):
+            return await self._get_quote(usd_amount, generate_link, log)
+
+    async def _get_quote(self, usd_amount: float, generate_link: bool, log) -> dict | None:
+        if not self._slug:
             return None
 
-    # 3. Consulta payment-terms via API (instantâneo)
-    terms = _fetch_payment_terms(session, slug, usd_amount, log)
-    if not terms:
-        return None
+        cache = self.client.terms_cache
+        model = self.client.local_model
+        cached = cache.get(_terms_cache_key(self._slug, usd_amount))
+        if cached is not None:
+            log(f"Cotação em cache para USD {usd_amount:.2f}.")
+            annotate(terms="cache")
+            result = copy.deepcopy(cached)
+        elif model is not None and not model.is_stale():
+            log(f"Cotação derivada localmente para USD {usd_amount:.2f}.")
+            annotate(terms="local")
+            result = _parse_payment_terms(model.predict(usd_amount), log)
+        else:
+            log(f"Consultando termos de pagamento: USD {usd_amount:.2f}...")
+            annotate(terms="api")
+            with span("glin.payment_terms"):
+                terms, slug = await self._call(
+                    lambda slug: self._http.get(_payment_terms_url(slug, usd_amount)),
+                    lambda resp, slug: _handle_payment_terms_response(resp, log),
+                    log,
+                )
+            if not terms:
+                return None
+            if model is not None:
+                model.reanchor(usd_amount, terms, log)
+            result = _parse_payment_terms(terms, log)
+            cache.set(_terms_cache_key(slug, usd_amount), copy.deepcopy(result))
+
+        if generate_link:
+            result["payment_link"] = await self._get_payment_link(usd_amount, log)
+
+        return result
+
+    async def _get_payment_link(self, usd_amount: float, log) -> str | None:
+        """Versão assíncrona de GlinClient.get_payment_link (mesmo registro de links)."""
+        registry = self.client.link_registry
+        # Tarefas deste loop esperam no lock assíncrono; só a primeira de cada valor
+        # disputa (numa thread) o lock do GlinClient, compartilhado com as chamadas síncronas
+        with self._link_locks.lock_for(f"USD{usd_amount:.2f}") as task_lock:
+            async with task_lock:
+                with self.client.link_lock(usd_amount) as shared_lock:
+                    await asyncio.to_thread(shared_lock.acquire)
+                    try:
+                        reused = registry.get(self._slug, usd_amount) if self._slug else None
+                        if reused is not None:
+                            link, age = reused
+                            log(f"Link reaproveitado (criado há {age / 60:.0f} min): {link}")
+                            annotate(link="reused")
+                            return link
+                        log("Gerando link de pagamento...")
+                        with span("glin.payment_link"):
+                            link, slug = await self._call(
+                                lambda slug: self._http.post(_payment_links_url(slug),
+                                                             json=_payment_link_payload(usd_amount)),
+                                lambda resp, slug: _handle_payment_link_response(resp, slug, usd_amount, log),
+                                log,
+                            )
+                        if link:
+                            registry.put(slug, usd_amount, link)
+                        return link
+                    finally:
+                        shared_lock.release()
+
+    async def get_quotes(self, amounts, generate_links: bool = False, log_func=None) -> list:
+        """Cota vários valores em paralelo. Retorna a lista na ordem de entrada."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(amount):
+            async with semaphore:
+                try:
+                    return await self.get_quote(amount, generate_link=generate_links, log_func=log_func)
+                except Exception as e:
+                    _make_logger(log_func)(f"Erro ao cotar USD {amount:.2f}: {e}")
+                    return None
+
+        amounts = list(amounts)
+        with span("glin.batch", log_func=_make_logger(log_func), count=len(amounts)):
+            return await asyncio.gather(*(one(a) for a in amounts))
+
+
+async def get_glin_quotes(amounts, generate_links: bool = False, log_func=None,
+                          concurrency: int = ASYNC_CONCURRENCY) -> list:
+    """
+    Cota uma lista de valores em USD de forma concorrente.
 
-    # 4. Parseia resultado
-    result = _parse_payment_terms(terms, log)
+    Retorna uma lista (mesma ordem de `amounts`) com o mesmo dicionário de
+    `get_glin_quote` para cada valor, ou None nas posições que falharam.
+    """
+    amounts = list(amounts)
+    async with AsyncGlinClient(concurrency=concurrency) as client:
+        if not await client.open(log_func):
+            return [None] * len(amounts)
+        return await client.get_quotes(amounts, generate_links=generate_links, log_func=log_func)
+
+
+# ──────────────────────────────────────────────
+# Função pública principal (interface compatível)
+# ──────────────────────────────────────────────
+
+def get_glin_quote(usd_amount: float, generate_link: bool = False, log_func=None) -> dict | None:
+    """
+    Obtém cotação Pix + Cartão da Glin via API REST direta.
 
-    # 5. Gera link de pagamento (opcional)
-    if generate_link:
-        link = _create_payment_link(session, slug, usd_amount, log)
-        result["payment_link"] = link
+    Retorna um dicionário com:
+        - pix: str          → "R$ 10.542,37"
+        - card_1x: str      → "R$ 10.887,21"
+        - installments: list → [{"n": 1, "value": "1x R$ ...", "total": "Total: R$ ..."}, ...]
+        - payment_link: str | None
 
-    return result
+    Retorna None em caso de falha. Usa o GlinClient compartilhado do
+    processo, então sessão, pool de conexões e slug são reaproveitados.
+    """
+    return get_client().get_quote(usd_amount, generate_link=generate_link, log_func=log_func)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+import time
+from urllib.parse import urlparse
+
+from cache import TTLCache, SQLiteBacking
+
+
+def product_slug(url):
+    # "https://stockx.com/air-jordan-4-retro-black-cat-2020?size=9" -> "air-jordan-4-retro-black-cat-2020"
+    path = urlparse(url.strip()).path.rstrip("/")
+    return path.rsplit("/", 1)[-1].lower()
+
+
+class ProductCache:
+    """
+    Cache of StockX product metadata keyed by URL slug.
+
+    Each entry keeps the detected category, the scanned size options
+    (with last-seen asks) and the last checkout totals per size index:
+
+        {"category": "Sneakers", "sizes": [...], "scanned_at": 1700000000.0,
+         "totals": {"3": {"total": 231.45, "at": 1700000100.0}}}
+
+    `ttl` bounds how long sizes/category are served without navigating;
+    `quote_ttl` (shorter) bounds how long a checkout total is reused.
+    Memory is an LRU; pass `db_path` to add a SQLite file backend shared
+    across runs.
+    """
+
+    def __init__(self, ttl=600, quote_ttl=120, maxsize=500, db_path=None):
+        self.ttl = ttl
+        self.quote_ttl = quote_ttl
+        backing = SQLiteBacking(db_path, table="stockx_products") if db_path else None
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, backing=backing)
+
+    def get(self, url):
+        entry = self._cache.get(product_slug(url))
+        if entry and time.time() - entry.get("scanned_at", 0) < self.ttl:
+            return entry
+        return None
+
+    def _update(self, url, **fields):
+        slug = product_slug(url)
+        entry = dict(self._cache.get(slug) or {"totals": {}})
+        entry.update(fields)
+        self._cache.set(slug, entry)
+        return entry
+
+    def put_sizes(self, url, sizes):
+        return self._update(url, sizes=sizes, scanned_at=time.time())
+
+    def put_category(self, url, category):
+        entry = self.get(url)
+        if entry is None:
+            return self._update(url, category=category, sizes=None, scanned_at=time.time())
+        return self._update(url, category=category)
+
+    def put_total(self, url, index, total):
+        entry = self.get(url) or {"totals": {}}
+        totals = dict(entry.get("totals") or {})
+        totals[str(index)] = {"total": total, "at": time.time()}
+        return self._update(url, totals=totals)
+
+    def get_total(self, url, index):
+        entry = self.get(url)
+        if not entry:
+            return None
+        hit = (entry.get("totals") or {}).get(str(index))
+        if hit and time.time() - hit["at"] < self.quote_ttl:
+            return hit["total"]
+        return None
+
+    def invalidate(self, url=None):
+        self._cache.invalidate(product_slug(url) if url else None)
+
+    def stats(self):
+        return self._cache.stats()
@@ -0,0 +1,302 @@
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import sqlite3
+import threading
+from itertools import groupby
+from urllib.parse import urlparse
+
+# Arquivo SQLite do histórico de cotações (padrão: src/quotes.db)
+LEDGER_DB = os.getenv("QUOTE_LEDGER_DB") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "quotes.db"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at    REAL    NOT NULL,
+    origin        TEXT    NOT NULL DEFAULT '',
+    customer      TEXT    NOT NULL DEFAULT '',
+    source        TEXT    NOT NULL,
+    category      TEXT    NOT NULL,
+    size          TEXT    NOT NULL DEFAULT '',
+    base_cents    INTEGER NOT NULL,
+    amount_cents  INTEGER NOT NULL,
+    breakdown     TEXT    NOT NULL,
+    pix           TEXT,
+    card_1x       TEXT,
+    installments  TEXT,
+    payment_link  TEXT,
+    link_id       TEXT,
+    message       TEXT,
+    quote_key     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_quotes_amount ON quotes (amount_cents, created_at);
+CREATE INDEX IF NOT EXISTS idx_quotes_base ON quotes (base_cents, created_at);
+CREATE INDEX IF NOT EXISTS idx_quotes_category ON quotes (category, created_at);
+CREATE INDEX IF NOT EXISTS idx_quotes_created ON quotes (created_at);
+CREATE INDEX IF NOT EXISTS idx_quotes_link ON quotes (link_id);
+"""
+
+# Bancos criados antes da coluna quote_key
+MIGRATIONS = (
+    ("quote_key", "ALTER TABLE quotes ADD COLUMN quote_key TEXT"),
+)
+INDEXES_AFTER_MIGRATION = "CREATE INDEX IF NOT EXISTS idx_quotes_key ON quotes (quote_key);"
+
+COLUMNS = (
+    "created_at", "origin", "customer", "source", "category", "size",
+    "base_cents", "amount_cents", "breakdown", "pix", "card_1x",
+    "installments", "payment_link", "link_id", "message", "quote_key",
+)
+GLIN_COLUMNS = ("pix", "card_1x", "installments", "payment_link", "link_id", "message")
+
+_STOP = object()
+
+
+def _cents(value) -> int:
+    return int(round(float(value) * 100))
+
+
+def link_id_from_url(link):
+    """'https://glinpay.me/<slug>/<id>/USD100.00' -> '<id>'."""
+    if not link:
+        return None
+    parts = [p for p in urlparse(link).path.split("/") if p]
+    return parts[1] if len(parts) >= 3 else None
+
+
+class QuoteLedger:
+    """
+    Histórico local (append-only) de cotações em SQLite.
+
+    Cada linha guarda as entradas (origem, categoria, tamanho, preço base),
+    o detalhamento do QuoteCalculator, os dados da Glin (Pix, cartão 1x,
+    parcelas, link de pagamento e seu id), a mensagem enviada e o horário.
+
+    `record()` não toca no disco: só enfileira a linha. Uma thread própria
+    grava em lotes (uma transação por lote) com o banco em modo WAL, então
+    o caminho da cotação não espera pelo SQLite e as leituras não bloqueiam
+    a escrita. As consultas usam índices por valor, categoria e data.
+    """
+
+    def __init__(self, path: str = LEDGER_DB, batch_size: int = 200, flush_interval: float = 0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self.written = 0
+        self.updated = 0
+        self.errors = 0
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(quotes)")}
+        for column, ddl in MIGRATIONS:
+            if column not in existing:
+                conn.execute(ddl)
+        conn.executescript(INDEXES_AFTER_MIGRATION)
+        conn.commit()
+
+        self._thread = threading.Thread(target=self._writer, name="quote-ledger", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _reader(self):
+        """Conexão de leitura por thread (sqlite3 não compartilha conexões entre threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ── Escrita ──
+
+    @staticmethod
+    def _glin_values(glin, message):
+        glin = glin or {}
+        link = glin.get("payment_link")
+        return (
+            glin.get("pix"),
+            glin.get("card_1x"),
+            json.dumps(glin["installments"], ensure_ascii=False) if glin.get("installments") else None,
+            link,
+            link_id_from_url(link),
+            message or None,
+        )
+
+    def record(self, quote: dict, source: str, category: str, size: str = "", glin: dict = None,
+               message: str = "", origin: str = "", customer: str = "", quote_key: str = None) -> str:
+        """
+        Enfileira uma cotação. `quote` é o dicionário de QuoteCalculator.calculate
+        (ou calculate_other_platform); `glin` é o retorno de get_glin_quote.
+        Retorna a chave da linha, usada por `update_glin` para completá-la depois.
+        """
+        quote_key = quote_key or uuid.uuid4().hex
+        row = (
+            time.time(),
+            origin or "",
+            customer or "",
+            source,
+            category.lower(),
+            size or "",
+            _cents(quote["base_price"]),
+            _cents(quote["final_quote"]),
+            json.dumps(quote, ensure_ascii=False, default=float),
+            *self._glin_values(glin, message),
+            quote_key,
+        )
+        self._queue.put(("insert", row))
+        return quote_key
+
+    def update_glin(self, quote_key: str, glin: dict, message: str = "", size: str = ""):
+        """
+        Completa uma cotação já registrada (ex.: ao calcular) com os dados da
+        Glin e a mensagem enviada, em vez de gravar uma segunda linha.
+        `size` vazio mantém o tamanho gravado.
+        """
+        self._queue.put(("update", (size or None, *self._glin_values(glin, message), quote_key)))
+
+    def _writer(self):
+        conn = self._connect()
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        sql = {
+            "insert": f"INSERT INTO quotes ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+            "update": (f"UPDATE quotes SET size = COALESCE(?, size), {', '.join(f'{c} = ?' for c in GLIN_COLUMNS)} "
+                       f"WHERE quote_key = ?"),
+        }
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            batch = [item]
+            # Junta o que mais chegar até o lote encher ou o intervalo passar
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            ops = [op for op in batch if op is not _STOP]
+            stop = len(ops) != len(batch)
+            if ops:
+                try:
+                    # Uma transação por lote; inserções e atualizações seguem a ordem da fila
+                    with conn:
+                        for kind, group in groupby(ops, key=lambda op: op[0]):
+                            conn.executemany(sql[kind], [params for _, params in group])
+                    self.written += sum(1 for kind, _ in ops if kind == "insert")
+                    self.updated += sum(1 for kind, _ in ops if kind == "update")
+                except sqlite3.Error as e:
+                    self.errors += len(ops)
+                    print(f"Erro ao gravar histórico de cotações: {e}")
+            for _ in batch:
+                self._queue.task_done()
+        conn.close()
+
+    def flush(self):
+        """Espera até que tudo que foi enfileirado esteja gravado."""
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    # ── Leitura ──
+
+    @staticmethod
+    def _row(row) -> dict:
+        entry = dict(row)
+        entry["base_price"] = entry.pop("base_cents") / 100
+        entry["final_quote"] = entry.pop("amount_cents") / 100
+        entry["breakdown"] = json.loads(entry["breakdown"])
+        entry["installments"] = json.loads(entry["installments"]) if entry["installments"] else []
+        return entry
+
+    def _query(self, where, params, limit):
+        sql = "SELECT * FROM quotes"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        rows = self._reader().execute(sql, (*params, int(limit))).fetchall()
+        return [self._row(r) for r in rows]
+
+    def recent(self, limit: int = 20, category: str = None, since: float = None) -> list:
+        """Últimas cotações (mais novas primeiro), opcionalmente por categoria / a partir de `since` (epoch)."""
+        where, params = [], []
+        if category:
+            where.append("category = ?")
+            params.append(category.lower())
+        if since is not None:
+            where.append("created_at >= ?")
+            params.append(since)
+        return self._query(where, params, limit)
+
+    def find(self, amount: float = None, base_price: float = None, category: str = None,
+             source: str = None, size: str = None, since: float = None,
+             with_message: bool = False, limit: int = 20) -> list:
+        """
+        Cotações com o mesmo valor final (`amount`) ou preço base, em centavos.
+        `with_message=True` devolve só as que têm mensagem pronta para reenviar.
+        """
+        where, params = [], []
+        if amount is not None:
+            where.append("amount_cents = ?")
+            params.append(_cents(amount))
+        if base_price is not None:
+            where.append("base_cents = ?")
+            params.append(_cents(base_price))
+        if category:
+            where.append("category = ?")
+            params.append(category.lower())
+        if source:
+            where.append("source = ?")
+            params.append(source)
+        if size is not None:
+            where.append("size = ?")
+            params.append(size)
+        if since is not None:
+            where.append("created_at >= ?")
+            params.append(since)
+        if with_message:
+            where.append("message IS NOT NULL")
+        return self._query(where, params, limit)
+
+    def by_link(self, link_or_id: str):
+        """Cotação que gerou um link de pagamento (URL completa ou id)."""
+        link_id = link_id_from_url(link_or_id) or link_or_id
+        rows = self._query(["link_id = ?"], [link_id], 1)
+        return rows[0] if rows else None
+
+    def stats(self) -> dict:
+        total = self._reader().execute("SELECT COUNT(*) FROM quotes").fetchone()[0]
+        return {"rows": total, "written": self.written, "updated": self.updated,
+                "pending": self._queue.qsize(), "errors": self.errors}
+
+
+_default_ledger = None
+_default_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> QuoteLedger:
+    """Retorna o QuoteLedger compartilhado pelo processo (gravado ao sair)."""
+    global _default_ledger
+    with _default_ledger_lock:
+        if _default_ledger is None:
+            _default_ledger = QuoteLedger()
+            atexit.register(_default_ledger.close)
+        return _default_ledger
@@ -0,0 +1,438 @@
+"""
+Serviço HTTP local de cotação (stdlib, sem dependências novas).
+
+Um único processo mantém o estado "quente" compartilhado por todos os
+operadores: QuoteCalculator, GlinClient (pool de conexões, slug validado,
+cache de payment-terms) e, opcionalmente, o navegador da Glin já logado
+(GlinBrowserKeeper). As interfaces (Streamlit, GUI, CLI) podem virar
+clientes finos via QuoteServiceClient.
+
+Rotas (JSON):
+    GET  /health                 → estado da sessão, caches e contadores
+    POST /quote                  → {price, category, source?, size?, glin?, link?}
+    POST /quote/batch            → {items: [...], glin?, links?}
+    GET  /glin/terms?amount=123  → Pix + parcelas (também aceita POST {amount})
+    POST /glin/link              → {amount, size?} Pix + parcelas + link de pagamento
+    GET  /quotes?amount=&category=&link=&limit=  → histórico (QuoteLedger), sem chamar a API
+
+Uso:
+    python src/quote_server.py [--host 127.0.0.1] [--port 8765] [--keeper]
+"""
+import os
+import json
+import math
+import time
+import asyncio
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from calculator import QuoteCalculator, format_glin_message, format_payment_link_message
+from batch_quote import parse_item, quote_chunks
+import glin_automation as glin
+from quote_ledger import get_ledger
+from tracing import tracer
+
+SERVER_HOST = os.getenv("QUOTE_SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("QUOTE_SERVER_PORT", "8765"))
+# Se definido, toda requisição precisa de "Authorization: Bearer <token>"
+SERVER_TOKEN = os.getenv("QUOTE_SERVER_TOKEN")
+# Limites por requisição (o lote inteiro fica em memória)
+MAX_BATCH_ITEMS = int(os.getenv("QUOTE_SERVER_MAX_BATCH", "1000"))
+MAX_BODY_BYTES = 2 * 1024 * 1024
+
+
+class RequestError(Exception):
+    """Erro de entrada do cliente (vira HTTP 400 com {"error": ...})."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class QuoteService:
+    """Estado quente do servidor e implementação das rotas (sem HTTP)."""
+
+    def __init__(self, calculator=None, client=None, keeper=False, ledger=None, log_func=None):
+        self.calculator = calculator or QuoteCalculator()
+        self.client = client or glin.get_client()
+        self.ledger = ledger or get_ledger()
+        self.log = glin._make_logger(log_func)
+        self.keeper = None
+        if keeper:
+            self.keeper = glin.start_browser_keeper(self.client, log_func=log_func)
+        self.started_at = time.time()
+        self.counters = {}
+        self._counters_lock = threading.Lock()
+        # Lotes com Glin: um AsyncGlinClient (pool httpx) de longa duração num loop próprio
+        self._loop = None
+        self._async_client = None
+        self._open_lock = None
+        self._loop_lock = threading.Lock()
+
+    def warm_up(self):
+        """Valida a sessão da Glin em background para a primeira cotação já sair quente."""
+        def run():
+            _, slug = self.client.ensure_session(self.log)
+            self.log(f"Sessão Glin pronta (merchant: {slug})." if slug else "Sessão Glin indisponível no momento.")
+        threading.Thread(target=run, name="glin-warm-up", daemon=True).start()
+
+    def close(self):
+        if self.keeper is not None:
+            glin.stop_browser_keeper()
+            self.keeper = None
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            if self._async_client is not None:
+                asyncio.run_coroutine_threadsafe(self._async_client.close(), loop).result(timeout=10)
+                self._async_client = None
+            loop.call_soon_threadsafe(loop.stop)
+
+    def _glin_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="glin-async", daemon=True).start()
+            return self._loop
+
+    async def _glin_quotes(self, amounts, generate_links, log):
+        # Roda no loop da Glin: reaproveita o cliente aberto; reabre se a sessão caiu
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            client = self._async_client
+            if client is not None and not client.merchant_slug:
+                await client.close()
+                client = self._async_client = None
+            if client is None:
+                client = glin.AsyncGlinClient(client=self.client)
+                if not await client.open(log):
+                    await client.close()
+                    return [None] * len(amounts)
+                self._async_client = client
+        return await client.get_quotes(amounts, generate_links=generate_links, log_func=log)
+
+    def count(self, route):
+        with self._counters_lock:
+            self.counters[route] = self.counters.get(route, 0) + 1
+
+    # ── Rotas ──
+
+    def health(self):
+        health = {
+            "status": "ok",
+            "uptime": round(time.time() - self.started_at, 1),
+            "glin_session": bool(self.client.merchant_slug),
+            "keeper": bool(self.keeper and self.keeper.is_running()),
+            "terms_cache": self.client.terms_cache.stats(),
+            "payment_links": self.client.link_registry.stats(),
+            "ledger": self.ledger.stats(),
+            "requests": dict(self.counters),
+        }
+        if tracer.enabled:
+            # p50/p95/p99 (ms) por etapa desde o início do servidor
+            health["tracing"] = tracer.stats()
+        return health
+
+    def _request_logger(self, logs):
+        def log(msg):
+            logs.append(msg)
+            self.log(msg)
+        return log
+
+    def _parse(self, payload):
+        item = parse_item(payload, self.calculator)
+        if item['error']:
+            raise RequestError(item['error'])
+        return item
+
+    def quote(self, payload):
+        item = self._parse(payload)
+        if item['source'] == 'stockx':
+            quote = self.calculator.calculate(item['price'], item['category'])
+        else:
+            quote = self.calculator.calculate_other_platform(item['price'], item['category'])
+
+        response = {"item": item, "quote": quote, "glin": None, "message": None, "logs": []}
+        generate_link = bool(payload.get("link"))
+        if payload.get("glin") or generate_link:
+            self._add_glin(response, quote['final_quote'], generate_link, item['size'])
+        self.ledger.record(quote, item['source'], item['category'], item['size'], glin=response["glin"],
+                           message=response["message"], origin="server", customer=payload.get("customer"))
+        return response
+
+    def quote_batch(self, payload):
+        rows = payload.get("items")
+        if not isinstance(rows, list):
+            raise RequestError("'items' deve ser uma lista")
+        if len(rows) > MAX_BATCH_ITEMS:
+            raise RequestError(f"Lote grande demais ({len(rows)} > {MAX_BATCH_ITEMS}); use python -m quoter batch")
+
+        items = []
+        for row_number, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                row = {'_error': "item deve ser um objeto"}
+            row = {str(k).lower(): v for k, v in row.items()}
+            row['_row'] = row_number
+            items.append(parse_item(row, self.calculator))
+        for _ in quote_chunks(items, self.calculator, chunk_size=len(items) or 1):
+            pass
+
+        logs = []
+        generate_links = bool(payload.get("links"))
+        if payload.get("glin") or generate_links:
+            quoted = [item for item in items if not item['error']]
+            # Mesma sessão/cache do GlinClient compartilhado, requisições em paralelo
+            # pelo pool httpx que fica aberto entre as requisições
+            results = asyncio.run_coroutine_threadsafe(self._glin_quotes(
+                [item['final_quote'] for item in quoted],
+                generate_links,
+                self._request_logger(logs),
+            ), self._glin_loop()).result()
+            for item, glin_data in zip(quoted, results):
+                item['glin'] = glin_data
+                if glin_data is None:
+                    item['error'] = "Falha ao obter dados da Glin."
+
+        for item in items:
+            if not item['error']:
+                self.ledger.record(self._batch_quote(item), item['source'], item['category'], item['size'],
+                                   glin=item.get('glin'), origin="server", customer=payload.get("customer"))
+        errors = sum(1 for item in items if item['error'])
+        return {"items": items, "quoted": len(items) - errors, "errors": errors, "logs": logs}
+
+    @staticmethod
+    def _batch_quote(item):
+        # Detalhamento no formato do QuoteCalculator a partir de uma linha do lote
+        keys = ('final_quote', 'stockx_total', 'markup_total', 'fee')
+        quote = {key: item[key] for key in keys if key in item}
+        quote['base_price'] = item['price']
+        return quote
+
+    def quotes(self, payload):
+        def number(key):
+            if payload.get(key) in (None, ""):
+                return None
+            try:
+                value = float(payload[key])
+            except (TypeError, ValueError):
+                raise RequestError(f"'{key}' deve ser numérico")
+            if not math.isfinite(value):
+                raise RequestError(f"'{key}' deve ser numérico")
+            return value
+
+        link = payload.get("link")
+        if link:
+            entry = self.ledger.by_link(link)
+            return {"quotes": [entry] if entry else []}
+        return {"quotes": self.ledger.find(
+            amount=number("amount"),
+            base_price=number("base_price"),
+            category=payload.get("category"),
+            source=payload.get("source"),
+            size=payload.get("size"),
+            since=number("since"),
+            # SQLite trata LIMIT negativo como "sem limite"
+            limit=min(max(int(number("limit") or 20), 1), 500),
+        )}
+
+    def glin_terms(self, payload, generate_link=False):
+        try:
+            amount = float(payload.get("amount"))
+        except (TypeError, ValueError):
+            raise RequestError("'amount' (USD) é obrigatório")
+        if not (math.isfinite(amount) and amount > 0):
+            raise RequestError("'amount' deve ser um número maior que 0")
+        response = {"amount": amount, "glin": None, "message": None, "logs": []}
+        self._add_glin(response, amount, generate_link, str(payload.get("size") or ""))
+        if generate_link:
+            # Link gerado avulso (sem cálculo): registra só o valor
+            self.ledger.record({"base_price": amount, "final_quote": amount}, "glin", "outros",
+                               str(payload.get("size") or ""), glin=response["glin"],
+                               message=response["message"], origin="server", customer=payload.get("customer"))
+        return response
+
+    def _add_glin(self, response, amount, generate_link, size):
+        result = self.client.get_quote(amount, generate_link=generate_link,
+                                       log_func=self._request_logger(response["logs"]))
+        if result is None:
+            raise RequestError("Falha ao obter dados da Glin.", status=502)
+        response["glin"] = result
+        if result.get("payment_link"):
+            response["message"] = format_payment_link_message(result["payment_link"])
+        else:
+            response["message"] = format_glin_message(amount, result, size)
+
+
+class QuoteRequestHandler(BaseHTTPRequestHandler):
+    server_version = "QuoteServer/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self) -> QuoteService:
+        return self.server.service
+
+    def log_message(self, fmt, *args):
+        self.service.log(f"[http] {self.address_string()} {fmt % args}")
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise RequestError("Content-Length inválido")
+        if length < 0:
+            raise RequestError("Content-Length inválido")
+        if length > MAX_BODY_BYTES:
+            raise RequestError("Corpo da requisição grande demais", status=413)
+        if not length:
+            return {}
+        try:
+            payload = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            raise RequestError(f"JSON inválido: {e}")
+        if not isinstance(payload, dict):
+            raise RequestError("O corpo deve ser um objeto JSON")
+        return payload
+
+    def _authorized(self):
+        token = self.server.token
+        return not token or self.headers.get("Authorization") == f"Bearer {token}"
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        route = url.path.rstrip("/") or "/"
+        try:
+            if not self._authorized():
+                raise RequestError("Não autorizado", status=401)
+            if method == "GET":
+                payload = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            else:
+                payload = self._read_json()
+
+            service = self.service
+            handlers = {
+                ("GET", "/health"): lambda: service.health(),
+                ("POST", "/quote"): lambda: service.quote(payload),
+                ("POST", "/quote/batch"): lambda: service.quote_batch(payload),
+                ("GET", "/glin/terms"): lambda: service.glin_terms(payload),
+                ("POST", "/glin/terms"): lambda: service.glin_terms(payload),
+                ("POST", "/glin/link"): lambda: service.glin_terms(payload, generate_link=True),
+                ("GET", "/quotes"): lambda: service.quotes(payload),
+            }
+            handler = handlers.get((method, route))
+            if handler is None:
+                known = {path for _, path in handlers}
+                raise RequestError("Método não permitido" if route in known else "Rota não encontrada",
+                                   status=405 if route in known else 404)
+            service.count(route)
+            self._send_json(200, handler())
+        except RequestError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except Exception as e:
+            self.service.log(f"Erro em {method} {route}: {e}")
+            self._send_json(500, {"error": f"Erro interno: {e}"})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+
+class QuoteServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service: QuoteService, token=SERVER_TOKEN):
+        super().__init__(address, QuoteRequestHandler)
+        self.service = service
+        self.token = token
+
+
+def serve(host=SERVER_HOST, port=SERVER_PORT, keeper=False, token=SERVER_TOKEN, log_func=None):
+    """Sobe o serviço e bloqueia até Ctrl+C."""
+    service = QuoteService(keeper=keeper, log_func=log_func)
+    server = QuoteServer((host, port), service, token=token)
+    service.warm_up()
+    service.log(f"Servidor de cotação em http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+# ──────────────────────────────────────────────
+# Cliente fino (para as interfaces)
+# ──────────────────────────────────────────────
+
+class QuoteServiceClient:
+    """
+    Cliente do quote_server. Os métodos retornam o JSON da resposta e
+    levantam RuntimeError com a mensagem do servidor em caso de erro.
+    """
+
+    def __init__(self, base_url=None, token=SERVER_TOKEN, timeout=120):
+        self.base_url = (base_url or f"http://{SERVER_HOST}:{SERVER_PORT}").rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def _request(self, method, path, **kwargs):
+        resp = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        try:
+            body = resp.json()
+        except ValueError:
+            body = {"error": resp.text}
+        if resp.status_code != 200:
+            raise RuntimeError(body.get("error") or f"HTTP {resp.status_code}")
+        return body
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def quote(self, price, category, source="stockx", size="", glin=False, link=False):
+        return self._request("POST", "/quote", json={
+            "price": price, "category": category, "source": source,
+            "size": size, "glin": glin, "link": link,
+        })
+
+    def quote_batch(self, items, glin=False, links=False):
+        return self._request("POST", "/quote/batch", json={"items": list(items), "glin": glin, "links": links})
+
+    def glin_terms(self, amount, size=""):
+        return self._request("POST", "/glin/terms", json={"amount": amount, "size": size})
+
+    def glin_link(self, amount):
+        return self._request("POST", "/glin/link", json={"amount": amount})
+
+    def quotes(self, **filters):
+        return self._request("GET", "/quotes", params=filters)["quotes"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP local de cotação (calculadora + Glin).")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--keeper", action="store_true",
+                        help="mantém um navegador da Glin logado em background")
+    args = parser.parse_args(argv)
+    serve(host=args.host, port=args.port, keeper=args.keeper)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,134 @@ import time
 import random
 from playwright.sync_api import sync_playwright
 
+from stockx_network import ResponseCapture, ResourceBlocker, parse_size_option
+from product_cache import ProductCache, product_slug
+from category_classifier import classify, category_label
+from tracing import span, traced, annotate
+
+# Shared by StockXQuoter and StockXQuoterPool
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+BROWSER_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--window-size=1920,1080',
+    '--start-maximized'
+]
+SIZE_DROPDOWN_SELECTOR = 'button[id^="menu-button-pdp-size-selector"]'
+MENU_ITEM_SELECTOR = '[role="menuitemradio"], [role="menuitem"]'
+BUY_SELECTORS = [
+    'button:has-text("Buy Now")',
+    'button:has-text("Buy for")',
+    '[data-testid="product-buy-button"]',
+    'a:has-text("Buy Now")'
+]
+BUY_ANY_SELECTOR = ", ".join(BUY_SELECTORS)
+PRICE_PATTERN = re.compile(r'\$[\d,]+\.\d{2}')
+
+# Installed as an init script on every document: a MutationObserver keeps
+# window.__sxGuard = {captcha, cookieBanner} up to date, so Python only reads
+# two booleans instead of serializing the whole page with page.content()
+PAGE_GUARD_JS = """(() => {
+    if (window.__sxGuardCheck) return;
+    const visible = el => !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+    const check = () => {
+        const body = document.body;
+        let captcha = visible(document.querySelector('#px-captcha-modal, #px-captcha'));
+        if (!captcha && body) {
+            const text = (body.innerText || '').toLowerCase();
+            captcha = text.includes('press & hold') || text.includes('verify you are human');
+        }
+        const cookieBanner = visible(document.querySelector('#onetrust-accept-btn-handler')) ||
+            visible(document.querySelector('.onetrust-close-btn-handler')) ||
+            [...document.querySelectorAll('button')].some(b => b.innerText.trim() === 'Accept All' && visible(b));
+        window.__sxGuard = {captcha, cookieBanner};
+        return window.__sxGuard;
+    };
+    window.__sxGuardCheck = check;
+    let pending = false;
+    const schedule = () => {
+        if (pending) return;
+        pending = true;
+        setTimeout(() => { pending = false; check(); }, 200);
+    };
+    const start = () => {
+        check();
+        new MutationObserver(schedule).observe(document.documentElement, {childList: true, subtree: true});
+    };
+    if (document.readyState === 'loading') document.addEventListener('DOMContentLoaded', start);
+    else start();
+})()"""
+PAGE_FLAGS_JS = "() => window.__sxGuard || (window.__sxGuardCheck ? window.__sxGuardCheck() : null)"
+CAPTCHA_CLEARED_JS = "() => window.__sxGuardCheck ? !window.__sxGuardCheck().captcha : !document.body.innerText.toLowerCase().includes('press & hold')"
+
+# One round trip for the whole size menu instead of one inner_text() per item
+SIZE_OPTIONS_JS = "els => els.map(el => el.innerText)"
+
+# Upper bounds (ms) for each event-driven wait in the checkout flow
+DEFAULT_WAIT_TIMEOUTS = {
+    "menu": 5000,      # size menu items rendered
+    "buy": 5000,       # buy button ready after picking a size
+    "review": 10000,   # "Review Order" button shown or URL already at checkout
+    "total": 20000,    # "Total (incl. tax)" attached with a $ value
+    "network": 5000,   # product/checkout JSON captured (intercept_network mode)
+}
+
+# True once the "Review Order" button is visible or we already reached checkout
+REVIEW_OR_CHECKOUT_JS = """() => location.href.includes('checkout') ||
+    [...document.querySelectorAll('button')].some(
+        b => b.innerText.trim() === 'Review Order' && b.offsetParent !== null)"""
+
+# True once the "Total (incl. tax)" node is attached and its row shows a $ amount
+TOTAL_READY_JS = """() => {
+    const hit = document.evaluate("//*[text()[contains(., 'Total (incl. tax)')]]",
+        document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    return !!(hit && hit.parentElement && /\\$[\\d,]+\\.\\d{2}/.test(hit.parentElement.innerText));
+}"""
+
+
+# Breadcrumb, page title and H1 in one round trip (feeds the category classifier)
+CATEGORY_TEXT_JS = """() => {
+    const crumb = document.querySelector('nav[aria-label="Breadcrumb"], nav[aria-label="breadcrumb"], .chakra-breadcrumb');
+    const h1 = document.querySelector('h1');
+    return {
+        breadcrumb: crumb ? crumb.innerText : '',
+        title: document.title || '',
+        h1: h1 ? h1.innerText : ''
+    };
+}"""
+
+
 class StockXQuoter:
-    def __init__(self, email, password):
+    def __init__(self, email, password, wait_timeouts=None, intercept_network=False, block_resources=False,
+                 product_cache=None):
         self.email = email
         self.password = password
         self.browser = None
         self.page = None
         self.playwright = None
+        # Read sizes/prices from StockX JSON responses instead of the DOM (DOM stays as fallback)
+        self.capture = ResponseCapture() if intercept_network else None
+        self.last_options = []
+        self.last_checkout = None
+        # Abort images/fonts/media/analytics: True for the default profile or a ResourceBlocker
+        if block_resources is True:
+            block_resources = ResourceBlocker()
+        self.blocker = block_resources or None
+        self.last_block_stats = None
+        # Repeat quotes of the same product: True for an in-memory cache or a ProductCache
+        if product_cache is True:
+            product_cache = ProductCache()
+        self.product_cache = product_cache or None
+        self.current_url = None
+        # Per-stage wait limits (ms), see DEFAULT_WAIT_TIMEOUTS
+        self.wait_timeouts = dict(DEFAULT_WAIT_TIMEOUTS, **(wait_timeouts or {}))
+        # Seconds spent in each stage of the last execute_quote
+        self.last_timings = {}
 
     def start_browser(self, headless=False, use_saved_session=False):
         self.is_headless = headless # Track state
         self.playwright = sync_playwright().start()
         # Add arguments to make the browser look more real
-        args = [
-            '--disable-blink-features=AutomationControlled',
-            '--window-size=1920,1080',
-            '--start-maximized' 
-        ]
+        args = list(BROWSER_ARGS)
         
         # Determine launch options
         launch_opts = {
@@ -31,7 +142,7 @@ class StockXQuoter:
         
         context_opts = {
             "no_viewport": True,
-            "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+            "user_agent": USER_AGENT
         }
         
         # Load session if requested and exists
@@ -45,8 +156,14 @@ class StockXQuoter:
                 self.context = self.browser.new_context(**context_opts)
         else:
              self.context = self.browser.new_context(**context_opts)
+        
+        if self.blocker:
+            self.blocker.attach(self.context)
+        self.context.add_init_script(PAGE_GUARD_JS)
              
         self.page = self.context.new_page()
+        if self.capture:
+            self.capture.attach(self.page)
         
         try:
             from playwright_stealth import stealth_sync
@@ -86,21 +203,29 @@ class StockXQuoter:
         except:
              pass
 
+    def page_flags(self):
+        # Single in-page read of the guard flags kept by PAGE_GUARD_JS
+        try:
+            flags = self.page.evaluate(PAGE_FLAGS_JS)
+            if flags is None:
+                # Document predates the init script (e.g. about:blank); install it now
+                self.page.evaluate(PAGE_GUARD_JS)
+                flags = self.page.evaluate(PAGE_FLAGS_JS)
+            return flags or {}
+        except Exception:
+            return {}
+
+    @traced("stockx.captcha")
     def handle_captcha(self):
 
         # Check for common bot detection phrases
-        self.handle_cookies()
+        flags = self.page_flags()
+        if flags.get("cookieBanner"):
+            self.handle_cookies()
         
         try:
-            # Check for PerimeterX (px-captcha)
-            px_visible = False
-            if self.page.locator('#px-captcha-modal').count() > 0 and self.page.locator('#px-captcha-modal').is_visible():
-                px_visible = True
-            
-            content = self.page.content().lower()
-            captcha_text = "press & hold" in content or "verify you are human" in content or "challenge" in self.page.url
-            
-            if px_visible or captcha_text:
+            # PerimeterX modal / "press & hold" text, flagged in-page
+            if flags.get("captcha") or "challenge" in self.page.url:
                 print("!!!" * 10)
                 print("CAPTCHA / BOT DETECTION DETECTED")
                 
@@ -124,8 +249,9 @@ class StockXQuoter:
                 
                 # 2. Wait for solution
                 self.page.wait_for_function(
-                    "() => !document.body.innerText.toLowerCase().includes('press & hold')",
-                    timeout=0 # Wait indefinitely
+                    CAPTCHA_CLEARED_JS,
+                    timeout=0, # Wait indefinitely
+                    polling=500
                 )
                 print("Challenge appears to be cleared. Resuming...")
                 time.sleep(2)
@@ -200,136 +326,165 @@ class StockXQuoter:
         self.page.goto("https://stockx.com/")
         self.handle_captcha()
 
+    @traced("stockx.detect_category")
     def detect_category(self):
+        if self.product_cache and self.current_url:
+            entry = self.product_cache.get(self.current_url)
+            if entry and entry.get("category"):
+                print(f"Category from cache: {entry['category']}")
+                annotate(cache="hit")
+                return entry["category"]
+            self._ensure_on_product()
+
+        category = self._detect_category_live()
+        if self.product_cache and self.current_url:
+            self.product_cache.put_category(self.current_url, category)
+        return category
+
+    def _detect_category_live(self):
         self.handle_captcha()
         try:
-            # Get text from Breadcrumbs and Title
-            breadcrumbs = ""
-            try:
-                if self.page.locator('nav[aria-label="Breadcrumb"]').count() > 0:
-                    breadcrumbs = self.page.locator('nav[aria-label="Breadcrumb"]').inner_text().lower()
-                elif self.page.locator('nav[aria-label="breadcrumb"]').count() > 0:
-                    breadcrumbs = self.page.locator('nav[aria-label="breadcrumb"]').inner_text().lower()
-                # Also try generic class if aria fails
-                elif self.page.locator('.chakra-breadcrumb').count() > 0:
-                    breadcrumbs = self.page.locator('.chakra-breadcrumb').inner_text().lower()
-            except:
-                pass
-            
-            title = self.page.title().lower()
-            product_title = ""
-            try:
-                # Try to get the H1 product title on the page too
-                if self.page.locator('h1').count() > 0:
-                    product_title = self.page.locator('h1').first.inner_text().lower()
-            except:
-                pass
-                
-            # print(f"DEBUG: Breadcrumbs: '{breadcrumbs}'")
-            # print(f"DEBUG: Page Title: '{title}'")
-            # print(f"DEBUG: Product H1: '{product_title}'")
-            
-            # Combined text to search
-            search_text = f"{breadcrumbs} {title} {product_title}"
-            
-            # Logic - Specific to General
-            if "jacket" in search_text or "coat" in search_text or "parka" in search_text:
-                return "Jacket"
-            elif "hoodie" in search_text or "hooded" in search_text or "sweatshirt" in search_text or "pullover" in search_text:
-                return "Hoodie"
-            elif "t-shirt" in search_text or "tee" in search_text or "shirt" in search_text or "top" in search_text:
-                # Be careful not to match 'shirt' in 'sweatshirt' (handled by order? No, sweatshirt is hoodie)
-                if "sweatshirt" not in search_text:
-                     return "T-Shirt"
-            
-            return "Sneakers" # Default
+            # Breadcrumbs, title and H1 in a single evaluate
+            texts = self.page.evaluate(CATEGORY_TEXT_JS)
+            return category_label(classify(**texts))
             
         except Exception as e:
             print(f"Error detecting category: {e}")
             return "Sneakers"
 
+    @traced("stockx.scan_sizes")
     def scan_sizes(self, url):
+        self.current_url = url
+        if self.product_cache:
+            entry = self.product_cache.get(url)
+            if entry and entry.get("sizes") is not None:
+                print(f"Sizes from cache for '{product_slug(url)}' ({len(entry['sizes'])} options).")
+                annotate(cache="hit")
+                self.last_options = entry["sizes"]
+                return self.last_options
+
+        options = self._scan_sizes_live(url)
+        if self.product_cache and options:
+            self.product_cache.put_sizes(url, options)
+        return options
+
+    @traced("stockx.goto")
+    def _goto_product(self, url):
         print(f"Navigating to {url}...")
         
         # Random sleep to mimic human hesitation
         time.sleep(random.uniform(1.0, 3.0))
         
+        if self.capture:
+            self.capture.reset()
+        if self.blocker:
+            self.blocker.reset()
         self.page.goto(url)
+        if self.blocker:
+            self.last_block_stats = self.blocker.take_stats()
+            print(f"Resource blocking: {ResourceBlocker.format_stats(self.last_block_stats)}")
         self.handle_captcha()
+
+    def _ensure_on_product(self):
+        # Cached scans skip navigation; go to the product only when the page is needed
+        if self.current_url and product_slug(self.page.url) != product_slug(self.current_url):
+            self._goto_product(self.current_url)
+
+    def _scan_sizes_live(self, url):
+        self.last_options = []
+        self._goto_product(url)
+        
+        # Network mode: sizes and asks straight from the product JSON
+        if self.capture and self._wait_for_capture(lambda: self.capture.variants):
+            options = self.capture.size_options()
+            print(f"Read {len(options)} sizes from network responses.")
+            self.last_options = options
+            return options
         
         # Open dropdown
         try:
             print("Scanning available sizes...")
-            size_dropdown = self.page.locator('button[id^="menu-button-pdp-size-selector"]')
+            size_dropdown = self.page.locator(SIZE_DROPDOWN_SELECTOR)
             if not size_dropdown.is_visible():
                     size_dropdown = self.page.get_by_text("Size:", exact=False)
             
             if size_dropdown.count() > 0:
                 size_dropdown.first.click(force=True)
-                time.sleep(1)
+                self._wait_stage("menu", lambda t: self.page.locator(MENU_ITEM_SELECTOR).first.wait_for(state="visible", timeout=t))
             else:
                 print("Size dropdown not found.")
                 # It might be One Size or Out of Stock
                 return []
             
-            # Scrape items
-            menu_items = self.page.locator('[role="menuitemradio"], [role="menuitem"]')
-            count = menu_items.count()
-            options = []
-            
-            for i in range(count):
-                raw_text = menu_items.nth(i).inner_text().replace('\n', ' ').strip()
-                # e.g., "US M 8.5 $1,328"
-                options.append({
-                    "index": i,
-                    "text": raw_text
-                })
+            # Scrape items (single evaluate_all round trip)
+            menu_items = self.page.locator(MENU_ITEM_SELECTOR)
+            texts = menu_items.evaluate_all(SIZE_OPTIONS_JS)
+            options = [parse_size_option(i, text) for i, text in enumerate(texts)]
             
+            self.last_options = options
             return options
         except Exception as e:
             print(f"Error scanning sizes: {e}")
             return []
 
+    @traced("stockx.quote")
     def execute_quote(self, size_selection_index):
+        if self.product_cache and self.current_url:
+            cached_total = self.product_cache.get_total(self.current_url, size_selection_index)
+            if cached_total:
+                print(f"Checkout total from cache: ${cached_total:,.2f}")
+                annotate(cache="hit")
+                return cached_total
+            self._ensure_on_product()
+
+        total = self._execute_quote_live(size_selection_index)
+        if self.product_cache and self.current_url and total > 0:
+            self.product_cache.put_total(self.current_url, size_selection_index, total)
+        return total
+
+    def _execute_quote_live(self, size_selection_index):
         # Assumes we are already on the page
+        self.last_timings = {}
         self.handle_captcha()
         
         try:
+            # 1. Select size
+            stage_start = time.perf_counter()
             # Re-open dropdown if needed or just find the item
-            size_dropdown = self.page.locator('button[id^="menu-button-pdp-size-selector"]')
+            size_dropdown = self.page.locator(SIZE_DROPDOWN_SELECTOR)
             if not size_dropdown.is_visible():
                  size_dropdown = self.page.get_by_text("Size:", exact=False)
             
+            menu_items = self.page.locator(MENU_ITEM_SELECTOR)
             if size_dropdown.count() > 0:
                 # If valid, click it. If it's already open, clicking might close it?
                 # Check existance of menu items
                 if self.page.locator('[role="menuitemradio"]').count() == 0:
                     size_dropdown.first.click()
-                    time.sleep(1)
+                    self._wait_stage("menu", lambda t: menu_items.first.wait_for(state="visible", timeout=t))
             
             # Click the specific index
-            menu_items = self.page.locator('[role="menuitemradio"], [role="menuitem"]')
-            if size_selection_index < menu_items.count():
-                text = menu_items.nth(size_selection_index).inner_text()
+            target = self._menu_item_for(menu_items, size_selection_index)
+            if target is not None:
+                text = target.inner_text()
                 print(f"Selecting: {text}")
-                menu_items.nth(size_selection_index).click()
-                time.sleep(2)
+                target.click()
+                # The buy button re-renders with the selected size's price
+                self._wait_stage("buy", lambda t: self.page.locator(BUY_ANY_SELECTOR).first.wait_for(state="visible", timeout=t))
             else:
                 print("Invalid size index selected.")
                 return 0.0
+            self._mark_stage("select_size", stage_start)
 
             # 2. Click Buy Now
+            stage_start = time.perf_counter()
             print("Clicking 'Buy Now'...")
+            if self.capture:
+                # Only pricing that arrives after the click can be the checkout total
+                self.capture.checkout = None
             # Attempt multiple selectors
             clicked_buy = False
-            selectors = [
-                'button:has-text("Buy Now")',
-                'button:has-text("Buy for")',
-                '[data-testid="product-buy-button"]',
-                'a:has-text("Buy Now")'
-            ]
-            
-            for sel in selectors:
+            for sel in BUY_SELECTORS:
                 if self.page.locator(sel).count() > 0 and self.page.locator(sel).first.is_visible():
                     try:
                         self.page.locator(sel).first.click(timeout=3000)
@@ -342,38 +497,51 @@ class StockXQuoter:
                  print("Could not auto-click Buy. Please click it manually.")
 
             self.handle_captcha()
+            self._mark_stage("buy", stage_start)
             
             # 3. Click Review Order (Intermediate Page)
+            stage_start = time.perf_counter()
             print("Waiting for 'Review Order' page...")
-            time.sleep(2)
             
             try:
-                for _ in range(5):
-                    if self.page.get_by_role("button", name="Review Order").first.is_visible():
-                        print("Clicking 'Review Order'...")
-                        self.page.get_by_role("button", name="Review Order").first.click()
-                        break
-                    elif "checkout" in self.page.url:
-                        print("Already at checkout.")
-                        break
-                    time.sleep(1)
+                self._wait_stage("review", lambda t: self.page.wait_for_function(REVIEW_OR_CHECKOUT_JS, timeout=t, polling=100))
+                review_btn = self.page.get_by_role("button", name="Review Order").first
+                if review_btn.is_visible():
+                    print("Clicking 'Review Order'...")
+                    review_btn.click()
+                elif "checkout" in self.page.url:
+                    print("Already at checkout.")
             except:
                 pass
 
             self.handle_captcha()
+            self._mark_stage("review", stage_start)
 
             # 4. Final Checkout - Get Total
+            stage_start = time.perf_counter()
             print("Waiting for pricing breakdown...")
-            time.sleep(5) 
+            self.last_checkout = None
+            if self.capture and self._wait_for_capture(lambda: self.capture.checkout):
+                self.last_checkout = self.capture.checkout
+                print(f"Checkout pricing from network: {self.last_checkout}")
+                self._mark_stage("total", stage_start)
+                self._report_timings()
+                return self.last_checkout["total"]
+
+            self._wait_stage("total", lambda t: self.page.wait_for_function(TOTAL_READY_JS, timeout=t, polling=100))
             
             total_label = self.page.get_by_text("Total (incl. tax)")
             if total_label.count() > 0:
                 parent_text = total_label.first.locator("..").inner_text()
                 print(f"Found checkout line: {parent_text.replace(chr(10), ' ')}")
-                matches = re.findall(r'\$[\d,]+\.\d{2}', parent_text)
+                matches = PRICE_PATTERN.findall(parent_text)
                 if matches:
+                    self._mark_stage("total", stage_start)
+                    self._report_timings()
                     return self.parse_price(matches[-1])
 
+            self._mark_stage("total", stage_start)
+            self._report_timings()
             print("Could not find total price automatically.")
             return 0.0
 
@@ -381,6 +549,46 @@ class StockXQuoter:
             print(f"Error during quoting flow: {e}")
             return 0.0
 
+    def _menu_item_for(self, menu_items, index):
+        # Network-scanned options carry the size label; match on it because the
+        # JSON variant order is not guaranteed to be the menu order
+        if index < len(self.last_options) and self.last_options[index].get("source") == "network":
+            size = self.last_options[index]["size"]
+            by_label = menu_items.filter(has_text=re.compile(rf"(^|\s){re.escape(size)}(\s|$)"))
+            if by_label.count() > 0:
+                return by_label.first
+        if index < menu_items.count():
+            return menu_items.nth(index)
+        return None
+
+    def _wait_for_capture(self, ready):
+        # Let Playwright dispatch response events until ready() or the network timeout
+        deadline = time.perf_counter() + self.wait_timeouts["network"] / 1000
+        while not ready():
+            if time.perf_counter() >= deadline:
+                return False
+            self.page.wait_for_timeout(100)
+        return True
+
+    def _wait_stage(self, name, wait):
+        # Run a condition-based wait bounded by wait_timeouts[name]; a timeout is not fatal
+        with span(f"stockx.wait.{name}") as stage:
+            try:
+                wait(self.wait_timeouts[name])
+                return True
+            except Exception:
+                print(f"Timed out waiting for '{name}' after {self.wait_timeouts[name]} ms.")
+                stage.set(timeout=True)
+                return False
+
+    def _mark_stage(self, name, started):
+        self.last_timings[name] = time.perf_counter() - started
+
+    def _report_timings(self):
+        if self.last_timings:
+            parts = " | ".join(f"{k}: {v:.2f}s" for k, v in self.last_timings.items())
+            print(f"Stage timings -> {parts} | total: {sum(self.last_timings.values()):.2f}s")
+
     def capture_price_manual(self):
         print("Manual Capture Mode engaged.")
         print("1. Please navigate manually to the FINAL Checkout/Review page.")
@@ -431,6 +639,7 @@ class StockXQuoter:
         # T-Shirt: * 0.98 + 20
         # Hoodie: * 0.98 + 30
         # Jacket: * 0.98 + 40
+        # Other: * 0.98 (no extra fee, same as QuoteCalculator's 'outros')
         
         base = stockx_total * 0.98
         fee = 0
@@ -442,7 +651,19 @@ class StockXQuoter:
             fee = 30
         elif category == "Jacket":
             fee = 40
+        elif category == "Other":
+            fee = 0
         else:
             fee = 50 # Default to sneakers if unknown
             
         return base + fee
+
+
+if __name__ == "__main__":
+    # Non-interactive entry points, e.g. `python -m quoter batch items.csv` (run from src/)
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from batch_quote import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    print("Usage: python -m quoter batch <items.csv|items.jsonl> [-o out.jsonl] [--glin] [--links]")
+    sys.exit(2)
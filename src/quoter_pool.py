@@ -0,0 +1,380 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+
+from stockx_network import ResourceBlocker
+from quoter import (
+    USER_AGENT,
+    BROWSER_ARGS,
+    SIZE_DROPDOWN_SELECTOR,
+    MENU_ITEM_SELECTOR,
+    BUY_SELECTORS,
+    BUY_ANY_SELECTOR,
+    PRICE_PATTERN,
+    SIZE_OPTIONS_JS,
+    DEFAULT_WAIT_TIMEOUTS,
+    REVIEW_OR_CHECKOUT_JS,
+    TOTAL_READY_JS,
+    PAGE_GUARD_JS,
+    PAGE_FLAGS_JS,
+    CATEGORY_TEXT_JS,
+    parse_size_option,
+)
+from category_classifier import classify, category_label
+from tracing import span, traced
+
+
+class PoolJob:
+    """One unit of work: scan a product URL and optionally quote one size."""
+
+    def __init__(self, url, size_index=None):
+        self.url = url
+        self.size_index = size_index
+
+    @classmethod
+    def coerce(cls, job):
+        # Accepts "url", ("url", index), {"url": ..., "size_index": ...} or a PoolJob
+        if isinstance(job, cls):
+            return job
+        if isinstance(job, str):
+            return cls(job)
+        if isinstance(job, dict):
+            return cls(job["url"], job.get("size_index"))
+        url, size_index = job
+        return cls(url, size_index)
+
+
+class StockXQuoterPool:
+    """
+    Quotes many StockX products in parallel with a single Chromium process.
+
+    The pool owns one browser and `size` isolated contexts, all created from
+    the same saved storage state (session.json). Each context has one page
+    and processes one job at a time, so up to `size` products are scanned and
+    checked out concurrently.
+
+    Playwright's sync API is bound to the thread that created it, so the pool
+    runs the async API on its own event loop thread; `run()` is a plain
+    iterator that yields results as they complete.
+
+    Memory is bounded by:
+      - `memory_mb`: V8 heap cap per renderer (--max-old-space-size)
+      - `recycle_after`: contexts are closed and recreated after this many jobs
+
+    A context that cannot be created (corrupt session.json, crashed browser)
+    fails only the job that needed it; the next job tries again. `run()`
+    gives up on outstanding jobs after `result_timeout` seconds without any
+    result, or as soon as no worker is left.
+    """
+
+    def __init__(self, size=3, headless=True, session_file="session.json",
+                 memory_mb=None, recycle_after=25, nav_timeout=60000, wait_timeouts=None,
+                 block_resources=False, result_timeout=300):
+        self.size = size
+        self.headless = headless
+        self.session_file = session_file
+        self.memory_mb = memory_mb
+        self.recycle_after = recycle_after
+        self.nav_timeout = nav_timeout
+        self.wait_timeouts = dict(DEFAULT_WAIT_TIMEOUTS, **(wait_timeouts or {}))
+        self.result_timeout = result_timeout
+        # Shared by all contexts; counters are pool-wide
+        if block_resources is True:
+            block_resources = ResourceBlocker()
+        self.blocker = block_resources or None
+
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._start_error = None
+        self._playwright = None
+        self._browser = None
+        self._jobs = None
+        self._workers = []
+
+    # -- Lifecycle --
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run_loop, name="stockx-pool", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._start_error is not None:
+            error, self._start_error = self._start_error, None
+            self._thread.join()
+            self._thread = None
+            raise error
+        return self
+
+    def close(self):
+        if self._loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        try:
+            future.result(timeout=30)
+        except Exception as e:
+            print(f"Error closing pool: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._thread = None
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._startup())
+        except Exception as e:
+            self._start_error = e
+            self._ready.set()
+            self._loop.close()
+            return
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _startup(self):
+        from playwright.async_api import async_playwright
+
+        args = list(BROWSER_ARGS)
+        if self.memory_mb:
+            args.append(f"--js-flags=--max-old-space-size={int(self.memory_mb)}")
+
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless, args=args)
+        self._jobs = asyncio.Queue()
+        self._workers = [self._spawn_worker(slot) for slot in range(self.size)]
+        print(f"Pool started: 1 browser, {self.size} contexts.")
+
+    def _spawn_worker(self, slot):
+        task = asyncio.create_task(self._worker(slot))
+        task.add_done_callback(lambda t: self._worker_done(slot, t))
+        return task
+
+    def _worker_done(self, slot, task):
+        # Workers only exit on shutdown; anything else is a bug, so replace the worker
+        if task.cancelled() or task.exception() is None or self._workers[slot] is not task:
+            return
+        print(f"Pool worker {slot} died: {task.exception()!r}. Restarting it.")
+        self._workers[slot] = self._spawn_worker(slot)
+
+    def _alive_workers(self):
+        return sum(1 for task in list(self._workers) if not task.done())
+
+    async def _shutdown(self):
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+
+    async def _new_context(self):
+        context_opts = {
+            "no_viewport": True,
+            "user_agent": USER_AGENT
+        }
+        if self.session_file and os.path.exists(self.session_file):
+            context_opts["storage_state"] = self.session_file
+        context = await self._browser.new_context(**context_opts)
+        try:
+            if self.blocker:
+                await self.blocker.attach_async(context)
+            await context.add_init_script(PAGE_GUARD_JS)
+            page = await context.new_page()
+            try:
+                from playwright_stealth import stealth_async
+                await stealth_async(page)
+            except ImportError:
+                pass
+        except Exception:
+            await self._close_context(context)
+            raise
+        return context, page
+
+    # -- Work queue --
+
+    def run(self, jobs):
+        """
+        Submit jobs and yield result dicts as they complete (not in input order).
+
+        Each job is a URL, a (url, size_index) tuple, a dict with "url" and
+        optional "size_index", or a PoolJob. Without a size index only the
+        scan (category + sizes) is done.
+        """
+        if self._loop is None:
+            self.start()
+        jobs = [PoolJob.coerce(job) for job in jobs]
+        results = queue.Queue()
+        for job in jobs:
+            self._loop.call_soon_threadsafe(self._jobs.put_nowait, (job, results))
+
+        pending = {id(job): job for job in jobs}
+        waited = 0.0
+        while pending:
+            try:
+                result = results.get(timeout=1.0)
+            except queue.Empty:
+                waited += 1.0
+                if self._alive_workers() and (not self.result_timeout or waited < self.result_timeout):
+                    continue
+                reason = "no pool worker left" if not self._alive_workers() else \
+                    f"no result after {self.result_timeout:.0f}s"
+                for job in pending.values():
+                    result = self._new_result(job, None)
+                    result["error"] = f"Pool gave up: {reason}"
+                    yield result
+                return
+            waited = 0.0
+            pending.pop(id(result["job"]), None)
+            yield result
+
+    def run_all(self, jobs):
+        """Like run(), but returns the list of results in input order."""
+        jobs = [PoolJob.coerce(job) for job in jobs]
+        by_job = {id(r["job"]): r for r in self.run(jobs)}
+        return [by_job[id(job)] for job in jobs]
+
+    @staticmethod
+    def _new_result(job, slot):
+        return {
+            "job": job,
+            "url": job.url,
+            "size_index": job.size_index,
+            "slot": slot,
+            "category": None,
+            "category_key": None,
+            "sizes": [],
+            "total": None,
+            "error": None,
+        }
+
+    async def _close_context(self, context):
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _worker(self, slot):
+        # The context is created lazily so a failure only fails the job at hand
+        context = page = None
+        processed = 0
+        try:
+            while True:
+                job, results = await self._jobs.get()
+                started = time.perf_counter()
+                result = self._new_result(job, slot)
+                try:
+                    if context is None:
+                        context, page = await self._new_context()
+                    await self._process(page, job, result)
+                except Exception as e:
+                    result["error"] = str(e) or type(e).__name__
+                    if page is not None and page.is_closed():
+                        # Crashed renderer/browser: start over with a fresh context
+                        await self._close_context(context)
+                        context = page = None
+                result["elapsed"] = time.perf_counter() - started
+                results.put(result)
+
+                processed += 1
+                if context is not None and self.recycle_after and processed >= self.recycle_after:
+                    # Drop the context to release renderer memory; the next job opens a new one
+                    await self._close_context(context)
+                    context = page = None
+                    processed = 0
+        finally:
+            if context is not None:
+                await self._close_context(context)
+
+    # -- Page flow (async mirror of StockXQuoter) --
+
+    async def _process(self, page, job, result):
+        with span("pool.job", url=job.url):
+            with span("pool.goto"):
+                await page.goto(job.url, timeout=self.nav_timeout)
+            if await self._captcha_present(page):
+                raise RuntimeError("captcha detected (solve it in a visible StockXQuoter session)")
+
+            result["category"] = await self._detect_category(page, result)
+            result["sizes"] = await self._scan_sizes(page)
+
+            if job.size_index is not None:
+                result["total"] = await self._checkout(page, job.size_index)
+
+    async def _captcha_present(self, page):
+        if "challenge" in page.url:
+            return True
+        flags = await page.evaluate(PAGE_FLAGS_JS)
+        return bool(flags and flags.get("captcha"))
+
+    async def _detect_category(self, page, result):
+        texts = await page.evaluate(CATEGORY_TEXT_JS)
+        result["category_key"] = classify(**texts)
+        return category_label(result["category_key"])
+
+    async def _open_size_menu(self, page):
+        size_dropdown = page.locator(SIZE_DROPDOWN_SELECTOR)
+        if not await size_dropdown.is_visible():
+            size_dropdown = page.get_by_text("Size:", exact=False)
+        if await size_dropdown.count() == 0:
+            return False
+        if await page.locator('[role="menuitemradio"]').count() == 0:
+            await size_dropdown.first.click(force=True)
+            await page.locator(MENU_ITEM_SELECTOR).first.wait_for(
+                state="visible", timeout=self.wait_timeouts["menu"])
+        return True
+
+    @traced("pool.scan_sizes")
+    async def _scan_sizes(self, page):
+        if not await self._open_size_menu(page):
+            return []
+        texts = await page.locator(MENU_ITEM_SELECTOR).evaluate_all(SIZE_OPTIONS_JS)
+        return [parse_size_option(i, text) for i, text in enumerate(texts)]
+
+    @traced("pool.checkout")
+    async def _checkout(self, page, size_index):
+        await self._open_size_menu(page)
+        menu_items = page.locator(MENU_ITEM_SELECTOR)
+        if size_index >= await menu_items.count():
+            raise ValueError(f"invalid size index {size_index}")
+        await menu_items.nth(size_index).click()
+        await page.locator(BUY_ANY_SELECTOR).first.wait_for(state="visible", timeout=self.wait_timeouts["buy"])
+
+        for sel in BUY_SELECTORS:
+            buy = page.locator(sel)
+            if await buy.count() > 0 and await buy.first.is_visible():
+                try:
+                    await buy.first.click(timeout=3000)
+                    break
+                except Exception:
+                    continue
+        else:
+            raise RuntimeError("buy button not found")
+
+        try:
+            await page.wait_for_function(REVIEW_OR_CHECKOUT_JS, timeout=self.wait_timeouts["review"], polling=100)
+            review = page.get_by_role("button", name="Review Order").first
+            if await review.is_visible():
+                await review.click()
+        except Exception:
+            pass  # Some flows go straight to checkout
+
+        await page.wait_for_function(TOTAL_READY_JS, timeout=self.wait_timeouts["total"], polling=100)
+        total_label = page.get_by_text("Total (incl. tax)").first
+        parent_text = await total_label.locator("..").inner_text()
+        matches = PRICE_PATTERN.findall(parent_text)
+        if not matches:
+            raise RuntimeError("total not found on checkout page")
+        return float(matches[-1].replace('$', '').replace(',', ''))
@@ -0,0 +1,351 @@
+import re
+from urllib.parse import urlparse
+
+# Checkout pricing keys -> normalized fee names
+FEE_KEYS = {
+    "processingfee": "processing",
+    "transactionfee": "processing",
+    "shippingfee": "shipping",
+    "shipping": "shipping",
+    "salestax": "tax",
+    "tax": "tax",
+    "estimatedtax": "tax",
+    "duties": "duties",
+}
+TOTAL_KEYS = ("total", "totalprice", "grandtotal", "ordertotal", "totalamount")
+SUBTOTAL_KEYS = ("subtotal", "price", "itemprice", "productprice")
+
+
+# Size menu text, e.g. "US M 8.5 $1,328" (DOM) or the same rebuilt from product JSON
+SIZE_TEXT_PATTERN = re.compile(r'^(?P<label>.*?)\s*(?:\$(?P<price>[\d,]+(?:\.\d{1,2})?))?\s*$')
+SIZE_SYSTEM_PATTERN = re.compile(r'^(?P<system>US [MWYK]|US|UK|EU|JP|CM|KR|BR|MX)\s+(?P<size>\S.*)$', re.IGNORECASE)
+
+
+def parse_size_option(index, raw_text):
+    # e.g. "US M 8.5 $1,328" -> system "US M", size "8.5", price 1328.0
+    text = raw_text.replace('\n', ' ').strip()
+    text = re.sub(r'\s+', ' ', text)
+    match = SIZE_TEXT_PATTERN.match(text)
+    label = match.group("label") if match else text
+    price = match.group("price") if match else None
+
+    size_system = None
+    size = label
+    system_match = SIZE_SYSTEM_PATTERN.match(label)
+    if system_match:
+        size_system = system_match.group("system").upper()
+        size = system_match.group("size")
+
+    return {
+        "index": index,
+        "text": text,
+        "size": label,
+        "size_system": size_system,
+        "size_value": size,
+        "price": float(price.replace(',', '')) if price else None,
+    }
+
+
+def _amount(value):
+    # StockX amounts show up as plain numbers, numeric strings or {"amount": n}
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace('$', '').replace(',', ''))
+        except ValueError:
+            return None
+    if isinstance(value, dict):
+        for key in ("amount", "value", "price"):
+            if key in value:
+                return _amount(value[key])
+    return None
+
+
+def _walk(data):
+    # Iterative walk over every dict in a JSON payload
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            yield node
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def parse_variant(variant):
+    """
+    Parse one product variant into {size, size_system, lowest_ask}.
+    Returns None if the dict doesn't look like a sized variant.
+    """
+    size = None
+    size_system = None
+    chart = variant.get("sizeChart") or {}
+    for option in chart.get("displayOptions") or []:
+        if option.get("size"):
+            size = option["size"]
+            size_system = option.get("type")
+            break
+    if size is None:
+        traits = variant.get("traits") or {}
+        size = traits.get("size") or chart.get("baseSize")
+        size_system = size_system or chart.get("baseType")
+    if not size:
+        return None
+
+    market = variant.get("market") or {}
+    state = market.get("state") or market.get("bidAskData") or {}
+    lowest_ask = _amount(state.get("lowestAsk"))
+    return {
+        "id": variant.get("id"),
+        "size": str(size),
+        "size_system": size_system,
+        "lowest_ask": lowest_ask,
+    }
+
+
+def parse_product_variants(payload):
+    """Find the first list of sized variants in a product payload."""
+    for node in _walk(payload):
+        variants = node.get("variants")
+        if isinstance(variants, list) and variants and isinstance(variants[0], dict):
+            parsed = [parse_variant(v) for v in variants if not v.get("hidden")]
+            parsed = [v for v in parsed if v]
+            if parsed:
+                return parsed
+    return []
+
+
+def parse_checkout_pricing(payload):
+    """
+    Find a pricing breakdown ({total, subtotal, fees}) in a checkout payload.
+    Returns None if no dict with a total plus at least one fee is present.
+    """
+    for node in _walk(payload):
+        lowered = {k.lower(): v for k, v in node.items() if isinstance(k, str)}
+        total = None
+        for key in TOTAL_KEYS:
+            if key in lowered:
+                total = _amount(lowered[key])
+                if total is not None:
+                    break
+        if total is None:
+            continue
+
+        fees = {}
+        for key, name in FEE_KEYS.items():
+            if key in lowered:
+                amount = _amount(lowered[key])
+                if amount is not None:
+                    fees[name] = fees.get(name, 0.0) + amount
+        if not fees:
+            continue
+
+        subtotal = None
+        for key in SUBTOTAL_KEYS:
+            if key in lowered:
+                subtotal = _amount(lowered[key])
+                if subtotal is not None:
+                    break
+        return {"total": total, "subtotal": subtotal, "fees": fees}
+    return None
+
+
+class ResponseCapture:
+    """
+    Listens to a page's network responses (page.on("response")) and keeps the
+    StockX product variants and checkout pricing parsed from JSON payloads.
+
+    This replaces per-element DOM reads with structured data; callers fall
+    back to the DOM whenever nothing was captured.
+    """
+
+    def __init__(self, hosts=("stockx.com",)):
+        self.hosts = hosts
+        self.variants = []
+        self.checkout = None
+        self.responses_seen = 0
+        self.payloads_parsed = 0
+
+    def attach(self, page):
+        page.on("response", self._on_response)
+
+    def reset(self):
+        self.variants = []
+        self.checkout = None
+
+    def _on_response(self, response):
+        try:
+            if response.request.resource_type not in ("xhr", "fetch"):
+                return
+            host = urlparse(response.url).hostname or ""
+            if not any(host == h or host.endswith("." + h) for h in self.hosts):
+                return
+            if "json" not in (response.headers.get("content-type") or ""):
+                return
+            self.responses_seen += 1
+            self.feed(response.json())
+        except Exception:
+            # Bodies can be gone after navigation; the DOM path covers it
+            pass
+
+    def feed(self, payload):
+        """Parse one JSON payload (also handy for replaying saved responses)."""
+        self.payloads_parsed += 1
+        variants = parse_product_variants(payload)
+        if variants:
+            self.variants = variants
+        pricing = parse_checkout_pricing(payload)
+        if pricing:
+            self.checkout = pricing
+
+    def size_options(self):
+        # Same shape as StockXQuoter.scan_sizes, ordered as the size menu: the
+        # menu text is rebuilt from the variant and parsed like the DOM path
+        options = []
+        for i, v in enumerate(self.variants):
+            label = v["size"]
+            if v["size_system"] and not SIZE_SYSTEM_PATTERN.match(label):
+                label = f"{v['size_system'].upper()} {label}"
+            price = v["lowest_ask"]
+            option = parse_size_option(i, label if price is None else f"{label} ${price:,.0f}")
+            # Keep the exact ask (the menu text rounds to whole dollars)
+            option["price"] = price
+            option["source"] = "network"
+            options.append(option)
+        return options
+
+
+# Resource types that never matter for reading sizes or the checkout total
+BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+
+# Third-party analytics / ads / tracking seen on StockX pages (see legacy/checkout_dump.html).
+# Anti-bot (PerimeterX), OneTrust and payment/fraud checks are left alone on purpose.
+BLOCKED_DOMAINS = (
+    "doubleclick.net",
+    "googletagmanager.com",
+    "google-analytics.com",
+    "googleadservices.com",
+    "googlesyndication.com",
+    "bat.bing.com",
+    "clarity.ms",
+    "criteo.com",
+    "criteo.net",
+    "amazon-adsystem.com",
+    "connect.facebook.net",
+    "analytics.tiktok.com",
+    "qualtrics.com",
+    "rokt.com",
+    "yourbow.com",
+    "evs.cdp.stockx.com",
+    "adnxs.com",
+    "rubiconproject.com",
+    "pubmatic.com",
+    "taboola.com",
+    "outbrain.com",
+    "hotjar.com",
+    "segment.io",
+    "amplitude.com",
+    "demdex.net",
+    "quantserve.com",
+    "rlcdn.com",
+    "liadm.com",
+    "px.ads.linkedin.com",
+)
+
+# Rough transfer sizes used to estimate what a blocked request would have cost
+ESTIMATED_BYTES = {
+    "image": 45_000,
+    "media": 400_000,
+    "font": 60_000,
+    "script": 40_000,
+    "xhr": 2_000,
+    "fetch": 2_000,
+    "ping": 500,
+    "other": 5_000,
+}
+
+
+class ResourceBlocker:
+    """
+    Request-routing profile for headless StockX sessions.
+
+    Aborts images, media, fonts and known third-party analytics domains while
+    letting documents, scripts, stylesheets and StockX API calls through (the
+    size selector and checkout need them). Counts blocked requests and an
+    estimate of the bytes saved per page load.
+
+    Note: Playwright disables the browser HTTP cache on routed contexts.
+    """
+
+    def __init__(self, resource_types=BLOCKED_RESOURCE_TYPES, domains=BLOCKED_DOMAINS):
+        self.resource_types = set(resource_types)
+        self.domains = tuple(domains)
+        self.reset()
+
+    def reset(self):
+        self.allowed = 0
+        self.blocked = 0
+        self.est_bytes_saved = 0
+        self.blocked_by_reason = {}
+
+    def stats(self):
+        return {
+            "allowed": self.allowed,
+            "blocked": self.blocked,
+            "est_bytes_saved": self.est_bytes_saved,
+            "blocked_by_reason": dict(self.blocked_by_reason),
+        }
+
+    def take_stats(self):
+        # Stats since the last call, e.g. for one page load
+        stats = self.stats()
+        self.reset()
+        return stats
+
+    def block_reason(self, url, resource_type):
+        if resource_type in self.resource_types:
+            return resource_type
+        host = urlparse(url).hostname or ""
+        for domain in self.domains:
+            if host == domain or host.endswith("." + domain):
+                return domain
+        return None
+
+    def _decide(self, request):
+        reason = self.block_reason(request.url, request.resource_type)
+        if reason is None:
+            self.allowed += 1
+            return False
+        self.blocked += 1
+        self.blocked_by_reason[reason] = self.blocked_by_reason.get(reason, 0) + 1
+        self.est_bytes_saved += ESTIMATED_BYTES.get(request.resource_type, ESTIMATED_BYTES["other"])
+        return True
+
+    def attach(self, context):
+        # Sync API (StockXQuoter)
+        context.route("**/*", self.handle)
+
+    def handle(self, route):
+        if self._decide(route.request):
+            route.abort("blockedbyclient")
+        else:
+            route.continue_()
+
+    async def attach_async(self, context):
+        # Async API (StockXQuoterPool)
+        await context.route("**/*", self.handle_async)
+
+    async def handle_async(self, route):
+        if self._decide(route.request):
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    @staticmethod
+    def format_stats(stats):
+        return (f"{stats['blocked']} blocked / {stats['allowed']} allowed, "
+                f"~{stats['est_bytes_saved'] / 1024:.0f} KB saved")
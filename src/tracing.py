@@ -0,0 +1,267 @@
+"""
+Rastreamento leve de latência por etapa (spans aninhados).
+
+Cada cotação vira uma árvore de spans (ex.: glin.quote > glin.validate_session,
+glin.payment_terms). Ao fechar o span raiz, a árvore é enviada para o
+`log_func` da chamada e, se configurado, gravada como uma linha JSON no
+arquivo de sink. Cada etapa mantém uma janela móvel de durações para
+p50/p95/p99 sob demanda (`tracer.stats()` / `tracer.dump()`).
+
+Desligado por padrão: `span()` devolve um objeto nulo e os decoradores
+chamam a função direto, então o custo é uma checagem de atributo.
+
+Configuração (.env):
+    QUOTE_TRACE=1                 liga o rastreamento
+    QUOTE_TRACE_FILE=trace.jsonl  sink JSON (uma árvore por linha)
+    QUOTE_TRACE_WINDOW=1000       amostras por etapa para os percentis
+
+Resumo de um sink gravado:
+    python src/tracing.py trace.jsonl
+"""
+import os
+import sys
+import json
+import math
+import time
+import inspect
+import threading
+import functools
+import contextvars
+from collections import deque
+
+TRACE_ENABLED = os.getenv("QUOTE_TRACE", "0") == "1"
+TRACE_FILE = os.getenv("QUOTE_TRACE_FILE")
+TRACE_WINDOW = int(os.getenv("QUOTE_TRACE_WINDOW", "1000"))
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    """Span nulo usado com o rastreamento desligado."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "log_func", "parent", "children",
+                 "started_at", "_start", "duration", "_token")
+
+    def __init__(self, tracer, name, log_func=None, attrs=None):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs or {}
+        self.log_func = log_func
+        self.parent = None
+        self.children = []
+        self.duration = None
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is not None:
+            self.parent = parent
+            parent.children.append(self)
+            if self.log_func is None:
+                self.log_func = parent.log_func
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._finish(self)
+        return False
+
+    def set(self, **attrs):
+        """Acrescenta atributos (ex.: origem do resultado: cache, api...)."""
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        entry = {
+            "name": self.name,
+            "start": round(self.started_at, 6),
+            "ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+        }
+        if self.attrs:
+            entry["attrs"] = self.attrs
+        if self.children:
+            entry["children"] = [child.to_dict() for child in self.children]
+        return entry
+
+    def lines(self, depth=0):
+        attrs = " ".join(f"{k}={v}" for k, v in self.attrs.items())
+        ms = f"{self.duration * 1000:.1f} ms" if self.duration is not None else "em andamento"
+        yield f"{'  ' * depth}{self.name}: {ms}" + (f" ({attrs})" if attrs else "")
+        for child in self.children:
+            yield from child.lines(depth + 1)
+
+
+def percentile(sorted_values, q):
+    """Percentil por posição mais próxima (nearest-rank) de uma lista ordenada."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(durations):
+    """{count, p50, p95, p99, max} em milissegundos."""
+    values = sorted(durations)
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50) * 1000, 3),
+        "p95": round(percentile(values, 95) * 1000, 3),
+        "p99": round(percentile(values, 99) * 1000, 3),
+        "max": round(values[-1] * 1000, 3),
+    }
+
+
+def format_stats(stats):
+    """Linhas de tabela (etapa, n, p50, p95, p99, max em ms) para exibir."""
+    if not stats:
+        return ["Nenhum span registrado."]
+    width = max(len(name) for name in stats)
+    lines = [f"{'etapa'.ljust(width)}  {'n':>6}  {'p50':>9}  {'p95':>9}  {'p99':>9}  {'max':>9}"]
+    for name, s in stats.items():
+        lines.append(f"{name.ljust(width)}  {s['count']:>6}  {s['p50']:>9.1f}  {s['p95']:>9.1f}  "
+                     f"{s['p99']:>9.1f}  {s['max']:>9.1f}")
+    return lines
+
+
+class Tracer:
+    def __init__(self, enabled=TRACE_ENABLED, sink_path=TRACE_FILE, window=TRACE_WINDOW):
+        self.enabled = enabled
+        self.sink_path = sink_path
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def enable(self, sink_path=None):
+        if sink_path:
+            self.sink_path = sink_path
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, log_func=None, **attrs):
+        """Context manager de um span; aninha sob o span atual (mesma thread/task)."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, log_func, attrs)
+
+    def traced(self, name):
+        """Decorador: cada chamada da função (síncrona ou async) vira um span."""
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    with Span(self, name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _finish(self, span):
+        with self._lock:
+            samples = self._samples.get(span.name)
+            if samples is None:
+                samples = self._samples[span.name] = deque(maxlen=self.window)
+            samples.append(span.duration)
+        if span.parent is None:
+            self._emit(span)
+
+    def _emit(self, root):
+        if root.log_func:
+            for line in root.lines():
+                root.log_func(f"[trace] {line}")
+        if self.sink_path:
+            record = json.dumps(root.to_dict(), ensure_ascii=False, default=str)
+            try:
+                with self._lock, open(self.sink_path, "a", encoding="utf-8") as f:
+                    f.write(record + "\n")
+            except OSError as e:
+                print(f"Erro ao gravar trace: {e}")
+
+    def stats(self):
+        """p50/p95/p99 (ms) por etapa, sobre a janela móvel."""
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+        return {name: summarize(values) for name, values in sorted(snapshot.items()) if values}
+
+    def dump(self, log_func=None):
+        """Escreve a tabela de percentis via `log_func` (ou print)."""
+        log = log_func or print
+        stats = self.stats()
+        for line in format_stats(stats):
+            log(line)
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+# Tracer do processo
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
+
+
+def annotate(**attrs):
+    """Acrescenta atributos ao span atual (no-op com o rastreamento desligado)."""
+    if tracer.enabled:
+        current = _current_span.get()
+        if current is not None:
+            current.set(**attrs)
+
+
+def _walk_spans(entry):
+    yield entry
+    for child in entry.get("children", ()):
+        yield from _walk_spans(child)
+
+
+def summarize_file(path):
+    """Percentis por etapa a partir de um sink JSONL gravado."""
+    durations = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for entry in _walk_spans(json.loads(line)):
+                if entry.get("ms") is not None:
+                    durations.setdefault(entry["name"], []).append(entry["ms"] / 1000)
+    return {name: summarize(values) for name, values in sorted(durations.items())}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python src/tracing.py trace.jsonl")
+        sys.exit(2)
+    for line in format_stats(summarize_file(sys.argv[1])):
+        print(line)
@@ -1,40 +1,110 @@
 import streamlit as st
 import os
+import time
+import uuid
 import traceback
 import asyncio
+import threading
 import sys
-sys.path.append('src') # Adiciona pasta src ao path para importar modulos
+from concurrent.futures import ThreadPoolExecutor
+# Adiciona pasta src ao path para importar modulos (uma vez; o script roda a cada rerun)
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
 
 # Bugfix for Playwright on Windows + Streamlit (Asyncio Loop Policy)
 if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
 # Ensure Playwright Browsers are installed (Critical for Cloud)
+import json
 import subprocess
 try:
     from playwright.sync_api import sync_playwright
 except ImportError:
     pass
 
+from file_utils import file_lock
+
+def _playwright_browsers_dir():
+    # Pasta padrão onde o Playwright guarda os navegadores
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~\\AppData\\Local"))
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(base, "ms-playwright")
+
+def _chromium_revision():
+    # Revisão do Chromium esperada pela versão instalada do Playwright
+    try:
+        import playwright
+        path = os.path.join(os.path.dirname(playwright.__file__), "driver", "package", "browsers.json")
+        with open(path, encoding="utf-8") as f:
+            for browser in json.load(f)["browsers"]:
+                if browser["name"] == "chromium":
+                    return browser["revision"]
+    except Exception:
+        pass
+    return None
+
+@st.cache_resource(show_spinner=False)
 def install_playwright_browsers():
-    if not os.environ.get("PLAYWRIGHT_BROWSERS_PATH"):
-         print("Verificando navegadores Playwright...")
-         try:
-            # Maneira mais garantida de rodar o Playwright install via bash environment
-            os.system("playwright install chromium")
-            os.system("playwright install-deps chromium")
-            print("Navegadores instalados (os.system).")
-         except Exception as e:
+    """
+    Instala o Chromium do Playwright uma única vez por processo.
+
+    O st.cache_resource evita repetir a verificação a cada rerun; o arquivo
+    marcador (com a revisão do Chromium) evita reinstalar entre reinícios, e
+    o lock impede duas sessões/processos instalando ao mesmo tempo.
+    """
+    if os.environ.get("PLAYWRIGHT_BROWSERS_PATH"):
+        return True
+
+    browsers_dir = _playwright_browsers_dir()
+    os.makedirs(browsers_dir, exist_ok=True)
+    marker = os.path.join(browsers_dir, ".quoter-chromium-revision")
+    revision = _chromium_revision()
+
+    with file_lock(marker + ".lock"):
+        try:
+            with open(marker, encoding="utf-8") as f:
+                if revision and f.read().strip() == revision:
+                    return True
+        except OSError:
+            pass
+
+        print("Verificando navegadores Playwright...")
+        try:
+            result = subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"],
+                                    capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"Aviso na instalação de navegadores: {result.stderr.strip()}")
+                return False
+            if sys.platform.startswith("linux"):
+                # Dependências do sistema (no Streamlit Cloud vêm do packages.txt)
+                subprocess.run([sys.executable, "-m", "playwright", "install-deps", "chromium"],
+                               capture_output=True, text=True)
+        except Exception as e:
             print(f"Aviso na instalação de navegadores: {e}")
+            return False
+
+        if revision:
+            with open(marker, "w", encoding="utf-8") as f:
+                f.write(revision)
+        print("Navegadores instalados.")
+    return True
 
 install_playwright_browsers()
 
+import hashlib
 from calculator import QuoteCalculator, format_glin_message, format_currency, format_payment_link_message
-from glin_automation import get_glin_quote
-from dotenv import load_dotenv
+from glin_automation import get_client, start_browser_keeper, reset_client, TERMS_CACHE_TTL
+from quote_ledger import get_ledger
+from dotenv import load_dotenv, find_dotenv
 
-# Load environment variables (credentials)
-load_dotenv()
+# Keeper de navegador Glin logado em background (opcional, um por processo)
+GLIN_BROWSER_KEEPER = os.getenv("GLIN_BROWSER_KEEPER", "0") == "1"
 
 # Page Config
 st.set_page_config(
@@ -46,9 +116,144 @@ st.set_page_config(
 # Title
 st.title("Personal Shopping Quoter 🛍️")
 
-# Initialize Calculator
-if 'calculator' not in st.session_state:
-    st.session_state.calculator = QuoteCalculator()
+# --- Recursos compartilhados pelo processo ---
+# Calculadora, cliente Glin (pool de conexões + cache) e navegador em
+# background são únicos por processo, não por aba/sessão.
+
+@st.cache_resource(show_spinner=False)
+def _env_state():
+    return {"mtime": None, "fingerprint": None, "lock": threading.Lock()}
+
+def _credentials_fingerprint():
+    raw = f"{os.getenv('GLIN_EMAIL', '')}\0{os.getenv('GLIN_PASSWORD', '')}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def load_environment():
+    """
+    Carrega o .env só quando ele muda (um stat por rerun). Se as credenciais
+    da Glin mudaram, descarta o cliente, o navegador e os cookies salvos.
+    """
+    state = _env_state()
+    env_file = find_dotenv(usecwd=True)
+    try:
+        mtime = os.path.getmtime(env_file) if env_file else None
+    except OSError:
+        mtime = None
+    with state["lock"]:
+        if mtime != state["mtime"]:
+            if env_file:
+                load_dotenv(env_file, override=True)
+            state["mtime"] = mtime
+        fingerprint = _credentials_fingerprint()
+        if state["fingerprint"] is not None and fingerprint != state["fingerprint"]:
+            print("Credenciais da Glin alteradas. Descartando sessão anterior...")
+            get_glin_client.clear()
+            get_browser_keeper.clear()
+            reset_client(clear_state=True)
+        state["fingerprint"] = fingerprint
+    return fingerprint
+
+@st.cache_resource(show_spinner=False)
+def get_calculator():
+    return QuoteCalculator()
+
+@st.cache_resource(show_spinner=False)
+def get_glin_client(credentials_fingerprint):
+    # Mesmo GlinClient do processo (quote_server, batch, etc. compartilham o pool)
+    return get_client()
+
+@st.cache_resource(show_spinner=False)
+def get_browser_keeper(credentials_fingerprint):
+    if not GLIN_BROWSER_KEEPER:
+        return None
+    return start_browser_keeper(get_glin_client(credentials_fingerprint))
+
+credentials_fingerprint = load_environment()
+get_browser_keeper(credentials_fingerprint)
+
+# --- Jobs da Glin em background ---
+# A automação (que pode incluir login via Playwright) roda num executor
+# compartilhado pelo processo; a página só guarda o id do job e acompanha
+# o status, então o operador pode seguir calculando enquanto o link é gerado.
+GLIN_JOB_WORKERS = int(os.getenv("GLIN_JOB_WORKERS", "4"))
+# Jobs concluídos ficam disponíveis por este tempo (segundos)
+GLIN_JOB_RETENTION = 3600
+
+class GlinJob:
+    def __init__(self, client, final_price, size, generate_link, quote_key=None):
+        self.id = uuid.uuid4().hex
+        self.client = client
+        # Linha do histórico gravada no Calcular; completada com os dados da Glin ao concluir
+        self.quote_key = quote_key
+        self.final_price = final_price
+        self.size = size
+        self.generate_link = generate_link
+        self.status = "running"   # running | done | failed
+        self.logs = []
+        self.result = None
+        self.message = ""
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def log(self, msg):
+        self.logs.append(msg)
+        print(msg)  # Mantém no console do servidor também
+
+    def run(self):
+        try:
+            self.log("Iniciando automação...")
+            result = self.client.get_quote(self.final_price, generate_link=self.generate_link, log_func=self.log)
+            if result:
+                if result.get('payment_link'):
+                    self.message = format_payment_link_message(result['payment_link'])
+                else:
+                    self.message = format_glin_message(self.final_price, result, self.size)
+                self.result = result
+                self.status = "done"
+                if self.quote_key:
+                    get_ledger().update_glin(self.quote_key, result, self.message, size=self.size)
+            else:
+                self.error = "Falha ao obter dados. Veja os logs acima para entender o motivo."
+                self.status = "failed"
+        except Exception:
+            self.error = traceback.format_exc()
+            self.status = "failed"
+        finally:
+            self.finished_at = time.time()
+
+
+class GlinJobManager:
+    def __init__(self, max_workers=GLIN_JOB_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="glin-job")
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, client, final_price, size, generate_link, quote_key=None):
+        job = GlinJob(client, final_price, size, generate_link, quote_key)
+        with self.lock:
+            self._prune()
+            self.jobs[job.id] = job
+        self.executor.submit(job.run)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _prune(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.finished_at and now - job.finished_at > GLIN_JOB_RETENTION]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+@st.cache_resource(show_spinner=False)
+def get_glin_jobs():
+    return GlinJobManager()
+
+# st.fragment (>= 1.37) reexecuta só o painel do job; versões antigas usam experimental_fragment
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
 
 # Initialize Session State for Results
 if 'quote_data' not in st.session_state:
@@ -57,11 +262,15 @@ if 'glin_result' not in st.session_state:
     st.session_state.glin_result = None
 if 'final_message' not in st.session_state:
     st.session_state.final_message = ""
+if 'glin_job_id' not in st.session_state:
+    st.session_state.glin_job_id = None
 
 # Callback function for Reset
 def reset_callback():
     st.session_state.quote_data = None
     st.session_state.glin_result = None
+    st.session_state.glin_job_id = None
+    st.session_state.quote_key = None
     st.session_state.final_message = ""
     st.session_state.price_stockx = 0.0
     # Verifica se a chave existe antes de resetar (safety check)
@@ -107,11 +316,22 @@ if calculate_btn:
             calc_category = "Outros"
 
         if source == "StockX":
-            quote = st.session_state.calculator.calculate(price_input, calc_category)
+            quote = get_calculator().calculate(price_input, calc_category)
         else:
-            quote = st.session_state.calculator.calculate_other_platform(price_input, calc_category)
+            quote = get_calculator().calculate_other_platform(price_input, calc_category)
         
         st.session_state.quote_data = quote
+        # Nova cotação: resultado/job da Glin da cotação anterior não valem mais
+        st.session_state.glin_result = None
+        st.session_state.glin_job_id = None
+        # Registrada já no cálculo; o job da Glin completa esta mesma linha
+        st.session_state.quote_key = get_ledger().record(
+            quote,
+            source="stockx" if source == "StockX" else "other",
+            category=calc_category.lower(),
+            size=size_input,
+            origin="streamlit",
+        )
         
         # Generate Draft Message
         if source == "StockX":
@@ -164,41 +384,78 @@ if st.session_state.quote_data:
                 st.error("⚠️ Insira o TAMANHO na barra lateral!")
              else:
                 final_price = st.session_state.quote_data['final_quote']
-                
-                with st.status("Processando...", expanded=True) as status:
-                    st.write("Iniciando automação...")
-                    log_area = st.empty()
-                    logs = []
-                    
-                    def ui_logger(msg):
-                        logs.append(msg)
-                        # Mostra as últimas 5 linhas de log para não poluir demais
-                        log_area.code("\n".join(logs[-5:]))
-                        print(msg) # Mantém no console do servidor também
-
-                    try:
-                        # Run Automation
-                        result = get_glin_quote(final_price, generate_link=generate_link, log_func=ui_logger)
-                    
-                        if result:
-                            status.update(label="Concluído!", state="complete", expanded=False)
-                            st.session_state.glin_result = result
-                            
-                            # Format Final Message
-                            if result.get('payment_link'):
-                                 msg = format_payment_link_message(result['payment_link'])
-                            else:
-                                 msg = format_glin_message(final_price, result, size_input)
-                            
-                            st.session_state.final_message = msg
-                            st.balloons()
-                        else:
-                            status.update(label="Falha", state="error", expanded=True)
-                            st.error("Falha ao obter dados. Veja os logs acima para entender o motivo.")
-                    except Exception as e:
-                        status.update(label="Erro Crítico", state="error")
-                        st.error("Erro na automação:")
-                        st.exception(e)
+                reused = None
+                if not generate_link:
+                    # Mesma cotação enviada há pouco (câmbio ainda válido): reaproveita sem chamar a Glin
+                    recent = get_ledger().find(amount=final_price, size=size_input, with_message=True,
+                                               since=time.time() - TERMS_CACHE_TTL, limit=5)
+                    reused = next((q for q in recent if not q['payment_link']), None)
+                if reused:
+                    st.session_state.glin_result = {
+                        'pix': reused['pix'],
+                        'card_1x': reused['card_1x'],
+                        'installments': reused['installments'],
+                        'payment_link': None,
+                    }
+                    st.session_state.final_message = reused['message']
+                    if st.session_state.get('quote_key'):
+                        get_ledger().update_glin(st.session_state.quote_key, st.session_state.glin_result,
+                                                 reused['message'], size=size_input)
+                    st.toast("Mensagem reaproveitada do histórico ⚡")
+                else:
+                    job = get_glin_jobs().submit(get_glin_client(credentials_fingerprint), final_price, size_input,
+                                                 generate_link, st.session_state.get('quote_key'))
+                    st.session_state.glin_job_id = job.id
+                    st.session_state.glin_result = None
+
+def render_glin_job():
+    job_id = st.session_state.get('glin_job_id')
+    job = get_glin_jobs().get(job_id) if job_id else None
+    if job is None:
+        return
+
+    if job.status == "running":
+        with st.status(f"Processando USD {job.final_price:,.2f}...", expanded=True):
+            if job.logs:
+                # Mostra as últimas 5 linhas de log para não poluir demais
+                st.code("\n".join(job.logs[-5:]))
+        if _fragment is None:
+            st.button("Atualizar status 🔄")
+        return
+
+    st.session_state.glin_job_id = None
+    if job.quote_key != st.session_state.get('quote_key'):
+        # Job de uma cotação anterior (ex.: Limpar/Calcular durante a execução): não sobrescreve a atual
+        st.session_state.glin_job_stale = job.final_price
+    elif job.status == "done":
+        st.session_state.glin_result = job.result
+        st.session_state.final_message = job.message
+        st.session_state.glin_job_done = True
+    else:
+        st.session_state.glin_job_error = (job.error, job.logs[-5:])
+    # Reexecuta a página inteira para exibir o resultado fora do fragmento
+    st.rerun()
+
+if _fragment is not None:
+    render_glin_job = _fragment(run_every=1)(render_glin_job)
+
+if st.session_state.get('glin_job_id'):
+    render_glin_job()
+
+stale_price = st.session_state.pop('glin_job_stale', None)
+if stale_price is not None:
+    st.toast(f"Resultado da Glin para USD {stale_price:,.2f} descartado: a cotação mudou.")
+
+job_error = st.session_state.pop('glin_job_error', None)
+if job_error:
+    error, logs = job_error
+    st.error("Falha na automação Glin:")
+    if logs:
+        st.code("\n".join(logs))
+    st.code(error)
+
+if st.session_state.pop('glin_job_done', False):
+    st.balloons()
 
 # --- FINAL OUTPUT ---
 if st.session_state.glin_result:
@@ -207,3 +464,17 @@ if st.session_state.glin_result:
     
     st.code(st.session_state.final_message, language="markdown")
     st.caption("Copie o texto acima e envie para o cliente.")
+
+# --- HISTÓRICO ---
+with st.expander("Histórico de cotações 🗂️"):
+    history = get_ledger().recent(limit=10)
+    if not history:
+        st.caption("Nenhuma cotação registrada ainda.")
+    for entry in history:
+        when = time.strftime("%d/%m %H:%M", time.localtime(entry['created_at']))
+        label = f"{when} · {entry['category']} · {entry['size'] or '-'} · {format_currency(entry['final_quote'])}"
+        if entry['payment_link']:
+            label += " · 🔗"
+        st.markdown(f"**{label}**")
+        if entry['message']:
+            st.code(entry['message'], language="markdown")